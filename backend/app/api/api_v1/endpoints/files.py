@@ -1,32 +1,48 @@
 from fastapi import APIRouter, HTTPException
 from typing import List
+import aiofiles.os
+import asyncio
 import os
-from datetime import datetime
+import stat as stat_module
+import time
 
 from app.core.config import settings
+from app.core.uploads import list_upload_dir, invalidate_upload_listing, format_timestamp, upload_path
 
 router = APIRouter()
 
+def _remove_files_older_than(cutoff: float) -> int:
+    """Delete uploaded files created before the cutoff timestamp (blocking)"""
+    deleted_count = 0
+    with os.scandir(settings.UPLOAD_DIR) as entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False) and entry.stat().st_ctime < cutoff:
+                os.remove(entry.path)
+                deleted_count += 1
+    return deleted_count
+
+async def _stat_regular_file(file_path: str) -> os.stat_result:
+    """Stat an uploaded file, raising 404/400 if it is missing or not a regular file"""
+    try:
+        st = await aiofiles.os.stat(file_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    if not stat_module.S_ISREG(st.st_mode):
+        raise HTTPException(status_code=400, detail="Not a file")
+    
+    return st
+
 @router.get("/list")
 async def list_uploaded_files():
     """
     List all uploaded files in the upload directory
     """
     try:
-        if not os.path.exists(settings.UPLOAD_DIR):
+        if not await aiofiles.os.path.exists(settings.UPLOAD_DIR):
             return {"files": [], "total": 0}
         
-        files = []
-        for filename in os.listdir(settings.UPLOAD_DIR):
-            file_path = os.path.join(settings.UPLOAD_DIR, filename)
-            if os.path.isfile(file_path):
-                stat = os.stat(file_path)
-                files.append({
-                    "filename": filename,
-                    "size": stat.st_size,
-                    "created_at": datetime.fromtimestamp(stat.st_ctime),
-                    "modified_at": datetime.fromtimestamp(stat.st_mtime)
-                })
+        files = await asyncio.to_thread(list_upload_dir)
         
         return {
             "files": files,
@@ -42,15 +58,12 @@ async def delete_file(filename: str):
     Delete a specific uploaded file
     """
     try:
-        file_path = os.path.join(settings.UPLOAD_DIR, filename)
+        file_path = upload_path(filename)
         
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="File not found")
+        await _stat_regular_file(file_path)
         
-        if not os.path.isfile(file_path):
-            raise HTTPException(status_code=400, detail="Not a file")
-        
-        os.remove(file_path)
+        await aiofiles.os.remove(file_path)
+        invalidate_upload_listing()
         
         return {"success": True, "message": f"File {filename} deleted successfully"}
         
@@ -65,21 +78,15 @@ async def get_file_info(filename: str):
     Get information about a specific uploaded file
     """
     try:
-        file_path = os.path.join(settings.UPLOAD_DIR, filename)
-        
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="File not found")
-        
-        if not os.path.isfile(file_path):
-            raise HTTPException(status_code=400, detail="Not a file")
+        file_path = upload_path(filename)
         
-        stat = os.stat(file_path)
+        stat = await _stat_regular_file(file_path)
         
         return {
             "filename": filename,
             "size": stat.st_size,
-            "created_at": datetime.fromtimestamp(stat.st_ctime),
-            "modified_at": datetime.fromtimestamp(stat.st_mtime),
+            "created_at": format_timestamp(stat.st_ctime),
+            "modified_at": format_timestamp(stat.st_mtime),
             "file_type": os.path.splitext(filename)[1].lower()
         }
         
@@ -94,22 +101,15 @@ async def cleanup_old_files():
     Clean up old uploaded files (older than 24 hours)
     """
     try:
-        if not os.path.exists(settings.UPLOAD_DIR):
+        if not await aiofiles.os.path.exists(settings.UPLOAD_DIR):
             return {"deleted": 0, "message": "No files to clean up"}
         
-        current_time = datetime.now()
-        deleted_count = 0
+        # Delete files older than 24 hours
+        cutoff = time.time() - 24 * 3600
+        deleted_count = await asyncio.to_thread(_remove_files_older_than, cutoff)
         
-        for filename in os.listdir(settings.UPLOAD_DIR):
-            file_path = os.path.join(settings.UPLOAD_DIR, filename)
-            if os.path.isfile(file_path):
-                file_time = datetime.fromtimestamp(os.path.getctime(file_path))
-                time_diff = current_time - file_time
-                
-                # Delete files older than 24 hours
-                if time_diff.total_seconds() > 24 * 3600:
-                    os.remove(file_path)
-                    deleted_count += 1
+        if deleted_count:
+            invalidate_upload_listing()
         
         return {
             "deleted": deleted_count,
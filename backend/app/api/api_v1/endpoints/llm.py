@@ -1,17 +1,22 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Optional
-from datetime import datetime
+from fastapi import APIRouter, HTTPException, Depends
+import hashlib
+import time
 
 from app.services.llm_service import LLMService
+from app.services.llm_cache import LLMCache
+from app.api.deps import get_llm
 from app.models.llm_models import (
-    ContentGenerationRequest, ContentGenerationResponse
+    ContentGenerationRequest, ContentGenerationResponse, ContentItemColumns
 )
 
 router = APIRouter()
-llm_service = LLMService()
+llm_cache = LLMCache()
 
 @router.post("/generate-content", response_model=ContentGenerationResponse)
-async def generate_educational_content(request: ContentGenerationRequest):
+async def generate_educational_content(
+    request: ContentGenerationRequest,
+    llm_service: LLMService = Depends(get_llm)
+):
     """
     Generate educational content from OCR extracted text
     """
@@ -19,18 +24,38 @@ async def generate_educational_content(request: ContentGenerationRequest):
         if not request.text or request.text.strip() == "":
             raise HTTPException(status_code=400, detail="Text cannot be empty")
         
-        # Generate educational content
-        content_result = await llm_service.generate_educational_content(
-            text=request.text,
-            topic=request.topic
-        )
+        # Identical text and topic produce the same content, so reuse earlier results.
+        # Only the generated content is kept, not the (possibly large) input text
+        start_time = time.time()
+        cache_params = {"task": "generate_content", "topic": request.topic}
+        cached = await llm_cache.get(request.text, cache_params)
+        
+        if cached is None:
+            # Generate educational content
+            content_result = await llm_service.generate_educational_content(
+                text=request.text,
+                topic=request.topic
+            )
+            if content_result['success']:
+                await llm_cache.set(request.text, cache_params, {
+                    'content_items': content_result['content_items'],
+                    'topic': content_result['topic']
+                })
+        else:
+            content_result = {
+                'success': True,
+                **cached,
+                'processing_time': time.time() - start_time,
+                'total_items': len(cached['content_items'])
+            }
         
         return ContentGenerationResponse(
             success=content_result['success'],
-            original_text=content_result['original_text'],
-            content_items=content_result.get('content_items', []),
+            original_text=request.text if request.echo_input else None,
+            original_text_sha256=hashlib.sha256(request.text.encode()).hexdigest(),
+            original_text_length=len(request.text),
+            content_items=ContentItemColumns.from_items(content_result.get('content_items', [])),
             topic=content_result.get('topic'),
-            processed_at=content_result.get('processed_at', datetime.utcnow()),
             processing_time=content_result.get('processing_time', 0.0),
             total_items=content_result.get('total_items', 0),
             error=content_result.get('error')
@@ -1,21 +1,25 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Depends
+from fastapi.responses import StreamingResponse
 from typing import List
+import asyncio
 import os
 import uuid
-from datetime import datetime
 
 from app.core.config import settings
+from app.core.uploads import save_upload, check_upload_size, remove_if_exists, upload_path
 from app.services.ocr_service import OCRService
-from app.models.ocr_models import OCRResponse, OCRRequest
+from app.models.ocr_models import OCRResponse
+from app.models.fast_models import OCRResponseFast
+from app.core.responses import MsgspecResponse, iter_ndjson
+from app.api.deps import get_ocr
 
 router = APIRouter()
-ocr_service = OCRService()
 
 @router.post("/extract", response_model=OCRResponse)
 async def extract_text_from_image(
     background_tasks: BackgroundTasks,
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    ocr_service: OCRService = Depends(get_ocr)
 ):
     """
     Extract text from uploaded image using OCR
@@ -25,27 +29,20 @@ async def extract_text_from_image(
     if file_extension not in settings.ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
-            detail=f"File type not allowed. Allowed types: {settings.ALLOWED_EXTENSIONS}"
+            detail=f"File type not allowed. Allowed types: {sorted(settings.ALLOWED_EXTENSIONS)}"
         )
     
     # Validate file size
-    if file.size and file.size > settings.MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE} bytes"
-        )
+    check_upload_size(file)
     
     try:
         # Generate unique filename
         file_id = str(uuid.uuid4())
-        file_extension = os.path.splitext(file.filename)[1]
         filename = f"{file_id}{file_extension}"
-        file_path = os.path.join(settings.UPLOAD_DIR, filename)
+        file_path = upload_path(filename)
         
         # Save uploaded file
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        await save_upload(file, file_path)
         
         # Extract text using OCR
         extracted_text = await ocr_service.extract_text(file_path)
@@ -53,24 +50,105 @@ async def extract_text_from_image(
         # Clean up file in background
         background_tasks.add_task(os.remove, file_path)
         
-        return OCRResponse(
+        return OCRResponse.build(
             success=True,
             text=extracted_text,
             file_id=file_id,
-            original_filename=file.filename,
-            processed_at=datetime.utcnow()
+            original_filename=file.filename
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         # Clean up file if it exists
-        if 'file_path' in locals() and os.path.exists(file_path):
-            os.remove(file_path)
+        if 'file_path' in locals():
+            remove_if_exists(file_path)
         raise HTTPException(status_code=500, detail=f"OCR processing failed: {str(e)}")
 
+async def _process_one(
+    file: UploadFile,
+    background_tasks: BackgroundTasks,
+    semaphore: asyncio.Semaphore,
+    ocr_service: OCRService
+) -> OCRResponseFast:
+    """
+    Validate, save and OCR a single file from a batch upload
+    """
+    async with semaphore:
+        # Validate file type
+        file_extension = os.path.splitext(file.filename)[1].lower()
+        if file_extension not in settings.ALLOWED_EXTENSIONS:
+            return OCRResponseFast(
+                success=False,
+                text="",
+                file_id="",
+                original_filename=file.filename,
+                error=f"File type not allowed: {file_extension}"
+            )
+        
+        # Validate file size
+        check_upload_size(file)
+        
+        # Generate unique filename
+        file_id = str(uuid.uuid4())
+        filename = f"{file_id}{file_extension}"
+        file_path = upload_path(filename)
+        
+        try:
+            # Save uploaded file
+            await save_upload(file, file_path)
+            
+            # Extract text using OCR
+            extracted_text = await ocr_service.extract_text(file_path)
+        except Exception:
+            # Clean up file if it exists
+            remove_if_exists(file_path)
+            raise
+        
+        # Clean up file in background
+        background_tasks.add_task(os.remove, file_path)
+        
+        return OCRResponseFast(
+            success=True,
+            text=extracted_text,
+            file_id=file_id,
+            original_filename=file.filename
+        )
+
+async def _process_one_or_error(
+    file: UploadFile,
+    background_tasks: BackgroundTasks,
+    semaphore: asyncio.Semaphore,
+    ocr_service: OCRService
+) -> OCRResponseFast:
+    """
+    Like _process_one, but report failures as an error result instead of raising
+    """
+    try:
+        return await _process_one(file, background_tasks, semaphore, ocr_service)
+    except Exception as e:
+        return OCRResponseFast(
+            success=False,
+            text="",
+            file_id="",
+            original_filename=file.filename,
+            error=str(e)
+        )
+
+async def _iter_completed(tasks: List[asyncio.Task]):
+    """Yield task results in completion order, cancelling leftovers if the consumer goes away"""
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
 @router.post("/batch-extract", response_model=List[OCRResponse])
 async def extract_text_from_multiple_images(
     background_tasks: BackgroundTasks,
-    files: List[UploadFile] = File(...)
+    files: List[UploadFile] = File(...),
+    ocr_service: OCRService = Depends(get_ocr)
 ):
     """
     Extract text from multiple uploaded images using OCR
@@ -78,59 +156,38 @@ async def extract_text_from_multiple_images(
     if len(files) > 10:  # Limit batch size
         raise HTTPException(status_code=400, detail="Maximum 10 files allowed per batch")
     
-    results = []
+    # Process files concurrently, bounded by the OCR concurrency limit
+    semaphore = asyncio.Semaphore(settings.OCR_CONCURRENCY)
+    results = await asyncio.gather(
+        *(_process_one_or_error(file, background_tasks, semaphore, ocr_service) for file in files)
+    )
     
-    for file in files:
-        try:
-            # Validate file type
-            file_extension = os.path.splitext(file.filename)[1].lower()
-            if file_extension not in settings.ALLOWED_EXTENSIONS:
-                results.append(OCRResponse(
-                    success=False,
-                    text="",
-                    file_id="",
-                    original_filename=file.filename,
-                    processed_at=datetime.utcnow(),
-                    error=f"File type not allowed: {file_extension}"
-                ))
-                continue
-            
-            # Generate unique filename
-            file_id = str(uuid.uuid4())
-            file_extension = os.path.splitext(file.filename)[1]
-            filename = f"{file_id}{file_extension}"
-            file_path = os.path.join(settings.UPLOAD_DIR, filename)
-            
-            # Save uploaded file
-            with open(file_path, "wb") as buffer:
-                content = await file.read()
-                buffer.write(content)
-            
-            # Extract text using OCR
-            extracted_text = await ocr_service.extract_text(file_path)
-            
-            # Clean up file in background
-            background_tasks.add_task(os.remove, file_path)
-            
-            results.append(OCRResponse(
-                success=True,
-                text=extracted_text,
-                file_id=file_id,
-                original_filename=file.filename,
-                processed_at=datetime.utcnow()
-            ))
-            
-        except Exception as e:
-            # Clean up file if it exists
-            if 'file_path' in locals() and os.path.exists(file_path):
-                os.remove(file_path)
-            results.append(OCRResponse(
-                success=False,
-                text="",
-                file_id="",
-                original_filename=file.filename,
-                processed_at=datetime.utcnow(),
-                error=str(e)
-            ))
+    return MsgspecResponse(results)
+
+@router.post("/batch-extract/stream")
+async def stream_text_from_multiple_images(
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    ocr_service: OCRService = Depends(get_ocr)
+):
+    """
+    Extract text from multiple uploaded images, streaming one OCRResponse
+    per line (NDJSON) as each file finishes
+    
+    Results arrive in completion order, not upload order; use
+    original_filename to match them up.
+    """
+    if len(files) > 10:  # Limit batch size
+        raise HTTPException(status_code=400, detail="Maximum 10 files allowed per batch")
+    
+    # Start all files now so work overlaps with streaming the first results
+    semaphore = asyncio.Semaphore(settings.OCR_CONCURRENCY)
+    tasks = [
+        asyncio.create_task(_process_one_or_error(file, background_tasks, semaphore, ocr_service))
+        for file in files
+    ]
     
-    return results 
\ No newline at end of file
+    return StreamingResponse(
+        iter_ndjson(_iter_completed(tasks)),
+        media_type="application/x-ndjson"
+    )
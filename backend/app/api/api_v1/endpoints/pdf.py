@@ -1,32 +1,116 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Depends, Query
 from fastapi.responses import StreamingResponse
-from typing import List
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import base64
 import os
 import uuid
 import logging
+import msgspec
+import tempfile
+import time
 from datetime import datetime
-import io
 
 logger = logging.getLogger(__name__)
 
-from app.core.config import settings
+from app.core.uploads import save_upload, check_upload_size, UPLOAD_CHUNK_SIZE, remove_if_exists, upload_path
 from app.services.pdf_service import PDFService
 from app.services.excel_service import ExcelService
 from app.services.llm_service import LLMService
-from app.models.pdf_models import PDFResponse, ExcelRequest
+from app.models.pdf_models import PDFResponse, PDFPagesResponse, ExcelRequest
+from app.models.fast_models import PDFResponseFast, PDFPagesResponseFast
+from app.core.responses import MsgspecResponse
+from app.models.base import now_ms
+from app.api.deps import get_pdf, get_excel, get_llm
 
 router = APIRouter()
-pdf_service = PDFService()
-excel_service = ExcelService()
-llm_service = LLMService()
+
+# Page info of paginated extractions, keyed by file_id, for follow-up page requests.
+# Kept on disk under the upload directory rather than in process memory, so any
+# worker on the host can serve the next page. Dot-prefixed, the upload listing
+# only shows regular files
+PAGES_DIR_NAME = ".pages"
+PAGES_TTL = 15 * 60
+
+def _pages_path(file_id: str) -> str:
+    return upload_path(os.path.join(PAGES_DIR_NAME, f"{file_id}.json"))
+
+def _store_pages(file_id: str, pages: List[Dict[str, Any]]) -> None:
+    """Save page info for later cursor requests, dropping expired entries (blocking)"""
+    pages_dir = upload_path(PAGES_DIR_NAME)
+    os.makedirs(pages_dir, exist_ok=True)
+    cutoff = time.time() - PAGES_TTL
+    with os.scandir(pages_dir) as entries:
+        for entry in entries:
+            try:
+                expired = entry.stat().st_mtime < cutoff
+            except FileNotFoundError:
+                # Already removed by another worker
+                continue
+            if expired:
+                remove_if_exists(entry.path)
+    
+    # Write then rename, so a concurrent reader never sees a partial file
+    tmp_path = f"{_pages_path(file_id)}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(msgspec.json.encode(pages))
+    os.replace(tmp_path, _pages_path(file_id))
+
+def _load_pages(file_id: str) -> Optional[List[Dict[str, Any]]]:
+    """Read saved page info, or None if it is unknown or expired (blocking)"""
+    path = _pages_path(file_id)
+    try:
+        if os.stat(path).st_mtime < time.time() - PAGES_TTL:
+            remove_if_exists(path)
+            return None
+        with open(path, "rb") as f:
+            return msgspec.json.decode(f.read())
+    except FileNotFoundError:
+        return None
+
+def _encode_page_cursor(file_id: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{file_id}:{offset}".encode()).decode()
+
+def _decode_page_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        file_id, offset = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit(":", 1)
+        # file_id names a file on disk, only accept the UUIDs we hand out
+        file_id, offset = str(uuid.UUID(file_id)), int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid page cursor")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid page cursor")
+    return file_id, offset
+
+def _page_window(
+    file_id: str,
+    pages: List[Dict[str, Any]],
+    offset: int,
+    limit: int
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Slice one batch of pages and build the cursor for the next batch, if any"""
+    end = offset + limit
+    next_cursor = _encode_page_cursor(file_id, end) if end < len(pages) else None
+    return pages[offset:end], next_cursor
+
+def _iter_file(path: str):
+    """Yield a file's contents in chunks"""
+    with open(path, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
 
 @router.post("/extract", response_model=PDFResponse)
 async def extract_text_from_pdf(
     background_tasks: BackgroundTasks,
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    page_limit: Optional[int] = Query(None, ge=1, le=1000, description="Return at most this many pages, with a cursor for the rest"),
+    pdf_service: PDFService = Depends(get_pdf)
 ):
     """
     Extract text from uploaded PDF file, including images
+    
+    With page_limit set, only the first batch of page info is returned;
+    fetch the rest from /extract/pages using next_page_cursor.
     """
     # Validate file type
     if not file.filename.lower().endswith('.pdf'):
@@ -36,22 +120,16 @@ async def extract_text_from_pdf(
         )
     
     # Validate file size
-    if file.size and file.size > settings.MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE} bytes"
-        )
+    check_upload_size(file)
     
     try:
         # Generate unique filename
         file_id = str(uuid.uuid4())
         filename = f"{file_id}.pdf"
-        file_path = os.path.join(settings.UPLOAD_DIR, filename)
+        file_path = upload_path(filename)
         
         # Save uploaded file
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        await save_upload(file, file_path)
         
         # Extract text from PDF
         result = await pdf_service.extract_text_from_pdf(file_path)
@@ -59,29 +137,60 @@ async def extract_text_from_pdf(
         # Clean up file in background
         background_tasks.add_task(os.remove, file_path)
         
-        return PDFResponse(
-            success=True,
-            file_id=file_id,
-            original_filename=file.filename,
-            text=result['text'],
-            structure=result['structure'],
-            pages=result['pages'],
-            image_count=result['image_count'],
-            total_pages=result['total_pages'],
-            processed_at=datetime.utcnow()
-        )
+        pages, next_cursor = result['pages'], None
+        if page_limit is not None:
+            pages, next_cursor = _page_window(file_id, result['pages'], 0, page_limit)
+            if next_cursor:
+                await asyncio.to_thread(_store_pages, file_id, result['pages'])
+        
+        # Page and structure lists can be long, encode them with msgspec
+        return MsgspecResponse(msgspec.convert({
+            'success': True,
+            'file_id': file_id,
+            'original_filename': file.filename,
+            'text': result['text'],
+            'structure': result['structure'],
+            'pages': pages,
+            'image_count': result['image_count'],
+            'total_pages': result['total_pages'],
+            'next_page_cursor': next_cursor
+        }, PDFResponseFast))
         
+    except HTTPException:
+        raise
     except Exception as e:
         # Clean up file if it exists
-        if 'file_path' in locals() and os.path.exists(file_path):
-            os.remove(file_path)
+        if 'file_path' in locals():
+            remove_if_exists(file_path)
         raise HTTPException(status_code=500, detail=f"PDF processing failed: {str(e)}")
 
+@router.get("/extract/pages", response_model=PDFPagesResponse)
+async def get_extracted_pages(
+    cursor: str,
+    limit: int = Query(50, ge=1, le=1000)
+):
+    """
+    Get the next batch of page info for a paginated PDF extraction
+    """
+    file_id, offset = _decode_page_cursor(cursor)
+    all_pages = await asyncio.to_thread(_load_pages, file_id)
+    if all_pages is None:
+        raise HTTPException(status_code=404, detail="Page cursor expired or unknown")
+    
+    pages, next_cursor = _page_window(file_id, all_pages, offset, limit)
+    return MsgspecResponse(msgspec.convert({
+        'file_id': file_id,
+        'pages': pages,
+        'next_page_cursor': next_cursor
+    }, PDFPagesResponseFast))
+
 @router.post("/generate-excel")
 async def generate_excel_from_pdf(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    include_metadata: bool = True
+    include_metadata: bool = True,
+    pdf_service: PDFService = Depends(get_pdf),
+    excel_service: ExcelService = Depends(get_excel)
 ):
     """
     Extract text from PDF and generate Excel file with structured content
@@ -93,16 +202,20 @@ async def generate_excel_from_pdf(
             detail="File must be a PDF"
         )
     
+    # Validate file size
+    check_upload_size(file)
+    
+    # Generate Excel filename
+    excel_filename = f"{os.path.splitext(file.filename)[0]}_content.xlsx"
+    
     try:
         # Generate unique filename
         file_id = str(uuid.uuid4())
         filename = f"{file_id}.pdf"
-        file_path = os.path.join(settings.UPLOAD_DIR, filename)
+        file_path = upload_path(filename)
         
         # Save uploaded file
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        await save_upload(file, file_path)
         
         # Extract text from PDF
         pdf_result = await pdf_service.extract_text_from_pdf(file_path)
@@ -121,7 +234,10 @@ async def generate_excel_from_pdf(
         logger.info(f"Excel data items: {len(excel_data.get('data', []))}")
         logger.info(f"Excel data sample: {excel_data.get('data', [])[:2]}")
         
-        # Create Excel file
+        # Create Excel file off the event loop, workbook generation is CPU-bound.
+        # It is written to a temp file and streamed so the bytes never sit in memory
+        fd, excel_path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
         if include_metadata:
             metadata = {
                 'original_filename': file.filename,
@@ -131,39 +247,47 @@ async def generate_excel_from_pdf(
                 'processed_at': datetime.utcnow().isoformat(),
                 'file_id': file_id
             }
-            excel_bytes = excel_service.create_advanced_excel(
-                excel_data['data'], 
+            await asyncio.to_thread(
+                excel_service.create_advanced_excel,
+                excel_data['data'],
                 metadata,
-                pdf_result.get('detailed_content', {})
+                pdf_result.get('detailed_content', {}),
+                output=excel_path
             )
         else:
-            excel_bytes = excel_service.create_excel_file(
+            await asyncio.to_thread(
+                excel_service.create_excel_file,
                 excel_data['data'],
-                detailed_content=pdf_result.get('detailed_content', {})
+                detailed_content=pdf_result.get('detailed_content', {}),
+                output=excel_path
             )
         
-        # Clean up file in background
+        # Clean up files in background. The response runs these after streaming,
+        # even if the client disconnected before the stream started
         background_tasks.add_task(os.remove, file_path)
-        
-        # Generate Excel filename
-        excel_filename = f"{os.path.splitext(file.filename)[0]}_content.xlsx"
+        background_tasks.add_task(remove_if_exists, excel_path)
         
         return StreamingResponse(
-            io.BytesIO(excel_bytes),
+            _iter_file(excel_path),
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={"Content-Disposition": f"attachment; filename={excel_filename}"}
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         # Clean up file if it exists
-        if 'file_path' in locals() and os.path.exists(file_path):
-            os.remove(file_path)
+        if 'file_path' in locals():
+            remove_if_exists(file_path)
+        if 'excel_path' in locals():
+            remove_if_exists(excel_path)
         raise HTTPException(status_code=500, detail=f"Excel generation failed: {str(e)}")
 
 @router.post("/get-excel-content")
 async def get_excel_content(
     background_tasks: BackgroundTasks,
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    pdf_service: PDFService = Depends(get_pdf)
 ):
     """
     Get Excel content without downloading the file
@@ -175,16 +299,17 @@ async def get_excel_content(
             detail="File must be a PDF"
         )
     
+    # Validate file size
+    check_upload_size(file)
+    
     try:
         # Generate unique filename
         file_id = str(uuid.uuid4())
         filename = f"{file_id}.pdf"
-        file_path = os.path.join(settings.UPLOAD_DIR, filename)
+        file_path = upload_path(filename)
         
         # Save uploaded file
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        await save_upload(file, file_path)
         
         # Extract text from PDF
         pdf_result = await pdf_service.extract_text_from_pdf(file_path)
@@ -213,16 +338,20 @@ async def get_excel_content(
             "original_filename": file.filename
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         # Clean up file if it exists
-        if 'file_path' in locals() and os.path.exists(file_path):
-            os.remove(file_path)
+        if 'file_path' in locals():
+            remove_if_exists(file_path)
         raise HTTPException(status_code=500, detail=f"Content generation failed: {str(e)}")
 
 @router.post("/analyze-content")
 async def analyze_pdf_content(
     background_tasks: BackgroundTasks,
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    pdf_service: PDFService = Depends(get_pdf),
+    llm_service: LLMService = Depends(get_llm)
 ):
     """
     Analyze PDF content and provide detailed insights
@@ -234,20 +363,26 @@ async def analyze_pdf_content(
             detail="File must be a PDF"
         )
     
+    # Validate file size
+    check_upload_size(file)
+    
     try:
         # Generate unique filename
         file_id = str(uuid.uuid4())
         filename = f"{file_id}.pdf"
-        file_path = os.path.join(settings.UPLOAD_DIR, filename)
+        file_path = upload_path(filename)
         
         # Save uploaded file
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        await save_upload(file, file_path)
         
         # Extract text from PDF
         pdf_result = await pdf_service.extract_text_from_pdf(file_path)
         
+        # Only the head of the text goes to the LLM; drop the full text so it
+        # can be freed before the (slow) LLM call
+        text_length = len(pdf_result['text'])
+        text_head = pdf_result.pop('text')[:5000]  # Limit to first 5000 chars for analysis
+        
         # Analyze content with LLM
         analysis_prompt = f"""
         Analyze the following PDF content and provide:
@@ -258,7 +393,7 @@ async def analyze_pdf_content(
         5. Educational value and learning objectives
         
         Content:
-        {pdf_result['text'][:5000]}  # Limit to first 5000 chars for analysis
+        {text_head}
         """
         
         analysis_result = await llm_service.process_text(
@@ -279,15 +414,17 @@ async def analyze_pdf_content(
             "stats": {
                 "total_pages": pdf_result['total_pages'],
                 "image_count": pdf_result['image_count'],
-                "text_length": len(pdf_result['text']),
+                "text_length": text_length,
                 "chapters": len(pdf_result['structure']['chapters']),
                 "sections": len(pdf_result['structure']['sections'])
             },
-            "processed_at": datetime.utcnow()
+            "processed_at_ms": now_ms()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         # Clean up file if it exists
-        if 'file_path' in locals() and os.path.exists(file_path):
-            os.remove(file_path)
+        if 'file_path' in locals():
+            remove_if_exists(file_path)
         raise HTTPException(status_code=500, detail=f"Content analysis failed: {str(e)}") 
\ No newline at end of file
@@ -0,0 +1,20 @@
+from fastapi import Request
+
+from app.services.llm_service import LLMService
+from app.services.pdf_service import PDFService
+from app.services.excel_service import ExcelService
+from app.services.ocr_service import OCRService
+
+# Services are created once in the app lifespan (see app.main) and shared via app.state
+
+def get_llm(request: Request) -> LLMService:
+    return request.app.state.llm
+
+def get_pdf(request: Request) -> PDFService:
+    return request.app.state.pdf
+
+def get_excel(request: Request) -> ExcelService:
+    return request.app.state.excel
+
+def get_ocr(request: Request) -> OCRService:
+    return request.app.state.ocr
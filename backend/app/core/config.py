@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import FrozenSet, List
 import os
 
 class Settings(BaseSettings):
@@ -28,6 +28,13 @@ class Settings(BaseSettings):
     GEMINI_API_KEY: str = ""
     GEMINI_MODEL: str = "gemini-2.5-flash"
     
+    # Max concurrent LLM API calls per process
+    LLM_CONCURRENCY: int = 8
+    
+    # LLM response cache
+    LLM_CACHE_MAXSIZE: int = 1024
+    LLM_CACHE_TTL: int = 3600  # seconds
+    
     # MathPix (for formula conversion)
     MATHPIX_API_KEY: str = ""
     MATHPIX_APP_ID: str = ""
@@ -35,10 +42,16 @@ class Settings(BaseSettings):
     # File upload
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 50 * 1024 * 1024  # 50MB for PDFs
-    ALLOWED_EXTENSIONS: List[str] = [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".pdf"]
+    ALLOWED_EXTENSIONS: FrozenSet[str] = frozenset({".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".pdf"})
     
     # OCR
     TESSERACT_CMD: str = "tesseract"
+    OCR_CONCURRENCY: int = 4  # Max files OCR'd in parallel per batch request
+    
+    @property
+    def cors_origins_list(self) -> List[str]:
+        """CORS_ORIGINS parsed as a comma-separated list of origins"""
+        return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
     
     class Config:
         env_file = ".env"
@@ -46,5 +59,8 @@ class Settings(BaseSettings):
 
 settings = Settings()
 
+# Resolve once so every path built from it is absolute, independent of the cwd
+settings.UPLOAD_DIR = os.path.abspath(settings.UPLOAD_DIR)
+
 # Create upload directory if it doesn't exist
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True) 
\ No newline at end of file
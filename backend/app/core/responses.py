@@ -0,0 +1,17 @@
+from fastapi.responses import Response
+from typing import Any, AsyncIterator
+import msgspec
+
+_encoder = msgspec.json.Encoder()
+
+class MsgspecResponse(Response):
+    """JSON response encoded with msgspec, for msgspec Structs (see app.models.fast_models)"""
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        return _encoder.encode(content)
+
+async def iter_ndjson(items: AsyncIterator[Any]) -> AsyncIterator[bytes]:
+    """Encode items as newline-delimited JSON as they arrive"""
+    async for item in items:
+        yield _encoder.encode(item) + b"\n"
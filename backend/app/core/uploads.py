@@ -0,0 +1,111 @@
+from fastapi import UploadFile, HTTPException
+from cachetools import TTLCache
+from typing import List, Dict, Any
+import aiofiles
+import os
+import time
+
+from app.core.config import settings
+
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1MB
+
+# Directory listing cache, keyed by (upload dir mtime, generation)
+_listing_cache = TTLCache(maxsize=1, ttl=2.0)
+_listing_generation = 0
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE} bytes"
+    )
+
+def check_upload_size(file: UploadFile) -> None:
+    """
+    Reject an upload whose declared size is over the limit
+    
+    The size is not always known up front (e.g. chunked transfers), so
+    save_upload also enforces the limit while streaming to disk.
+    """
+    if file.size is not None and file.size > settings.MAX_FILE_SIZE:
+        raise _too_large()
+
+async def save_upload(file: UploadFile, path: str, chunk_size: int = UPLOAD_CHUNK_SIZE) -> int:
+    """
+    Stream an uploaded file to disk in fixed-size chunks
+    
+    Args:
+        file: Uploaded file to save
+        path: Destination path on disk
+        chunk_size: Number of bytes read per chunk
+    
+    Returns:
+        Number of bytes written
+    """
+    written = 0
+    try:
+        async with aiofiles.open(path, "wb") as out:
+            while chunk := await file.read(chunk_size):
+                written += len(chunk)
+                if written > settings.MAX_FILE_SIZE:
+                    raise _too_large()
+                await out.write(chunk)
+    except BaseException:
+        # Don't leave partial uploads behind
+        remove_if_exists(path)
+        raise
+    
+    invalidate_upload_listing()
+    return written
+
+def upload_path(filename: str) -> str:
+    """Absolute path of a file inside the upload directory"""
+    return os.path.join(settings.UPLOAD_DIR, filename)
+
+def remove_if_exists(path: str) -> None:
+    """Delete a file, ignoring it if it is already gone"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def format_timestamp(ts: float) -> str:
+    """Format a stat timestamp as a local ISO 8601 string"""
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(ts))
+
+def invalidate_upload_listing():
+    """
+    Drop the cached upload directory listing
+    
+    Directory mtime already changes when entries are added or removed, but
+    its resolution is filesystem dependent, so writers bump a generation too.
+    """
+    global _listing_generation
+    _listing_generation += 1
+
+def list_upload_dir() -> List[Dict[str, Any]]:
+    """
+    List files in the upload directory, reusing a recent listing when
+    the directory has not changed
+    
+    Returns:
+        List of file info dictionaries (shared, do not mutate)
+    """
+    key = (os.stat(settings.UPLOAD_DIR).st_mtime_ns, _listing_generation)
+    files = _listing_cache.get(key)
+    if files is not None:
+        return files
+    
+    files = []
+    with os.scandir(settings.UPLOAD_DIR) as entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False):
+                stat = entry.stat()
+                files.append({
+                    "filename": entry.name,
+                    "size": stat.st_size,
+                    "created_at": format_timestamp(stat.st_ctime),
+                    "modified_at": format_timestamp(stat.st_mtime)
+                })
+    
+    _listing_cache[key] = files
+    return files
@@ -1,22 +1,47 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
 import os
 
 from app.core.config import settings
 from app.api.api_v1.api import api_router
+from app.services.llm_service import LLMService
+from app.services.pdf_service import PDFService
+from app.services.excel_service import ExcelService
+from app.services.ocr_service import OCRService
+from app.models.llm_models import ContentGenerationResponse
+from app.models.ocr_models import OCRResponse
+from app.models.pdf_models import PDFResponse
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up response models and create the shared services once per process"""
+    # Response models defer their schema build; pay for it at startup, not on the first request
+    for model in (ContentGenerationResponse, OCRResponse, PDFResponse):
+        model.model_rebuild()
+    
+    app.state.llm = LLMService()
+    app.state.ocr = OCRService()
+    app.state.pdf = PDFService(ocr_service=app.state.ocr, llm_service=app.state.llm)
+    app.state.excel = ExcelService()
+    yield
+    await app.state.llm.aclose()
 
 app = FastAPI(
     title="OCR-to-LLM Pipeline API",
     description="A modern API for extracting text from images using OCR and processing through LLMs",
     version="1.0.0",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Set up CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[settings.CORS_ORIGINS],
+    allow_origins=settings.cors_origins_list,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -26,8 +51,8 @@ app.add_middleware(
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 # Mount static files for uploaded images
-if os.path.exists("uploads"):
-    app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+if os.path.exists(settings.UPLOAD_DIR):
+    app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
 
 @app.get("/")
 async def root():
@@ -0,0 +1,67 @@
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+from typing import Any
+from datetime import datetime, timezone
+import time
+
+# Ingress limits for request models, enforced by pydantic-core before any handler code runs
+MAX_TEXT_LENGTH = 1_000_000
+MAX_SHORT_TEXT_LENGTH = 200
+
+# One TypeAdapter per target type, built on first use and reused for every later validation
+_VALIDATOR_CACHE: dict[Any, TypeAdapter] = {}
+
+def validated(cls: Any, data: Any) -> Any:
+    """
+    Validate JSON text or Python data against a model or type with a cached validator
+    
+    Args:
+        cls: Model class or type (e.g. list[str]) to validate against
+        data: JSON string/bytes, or already-parsed Python data
+    
+    Returns:
+        Validated instance of cls
+    """
+    adapter = _VALIDATOR_CACHE.get(cls)
+    if adapter is None:
+        adapter = _VALIDATOR_CACHE.setdefault(cls, TypeAdapter(cls))
+    if isinstance(data, (str, bytes)):
+        return adapter.validate_json(data)
+    return adapter.validate_python(data)
+
+def now_ms() -> int:
+    """Current UNIX time in milliseconds"""
+    return time.time_ns() // 1_000_000
+
+class AppModel(BaseModel):
+    """
+    Base class for API models
+    
+    Validators and serializers are built on first use instead of at import,
+    so models that a worker never touches cost nothing. Repeated JSON keys
+    are interned while parsing.
+    """
+    model_config = ConfigDict(defer_build=True, cache_strings='keys')
+
+class ResponseModel(AppModel):
+    """Base class for response models, which are built once server-side and then serialized"""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+    
+    @classmethod
+    def build(cls, **data):
+        """
+        Construct a response from trusted, already-validated server-side data
+        
+        Skips validation entirely, so nested fields must already be model
+        instances. All passed keys count as set, as with the normal constructor.
+        """
+        return cls.model_construct(_fields_set=set(data), **data)
+
+
+class TimestampedResponse(ResponseModel):
+    """Response model carrying its completion time as UNIX milliseconds"""
+    processed_at_ms: int = Field(default_factory=now_ms, description="UNIX timestamp (ms) when processing was completed")
+    
+    @property
+    def processed_at(self) -> datetime:
+        """Completion time as a UTC datetime (not serialized)"""
+        return datetime.fromtimestamp(self.processed_at_ms / 1000, tz=timezone.utc)
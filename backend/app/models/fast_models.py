@@ -0,0 +1,64 @@
+import msgspec
+
+from app.models.base import now_ms
+
+# msgspec mirrors of the pydantic response models for the hot endpoints.
+# Field names and defaults must stay in sync with ocr_models / pdf_models;
+# the pydantic models remain the documented response_model in OpenAPI.
+
+class OCRResponseFast(msgspec.Struct, kw_only=True):
+    """Mirror of OCRResponse"""
+    processed_at_ms: int = msgspec.field(default_factory=now_ms)
+    success: bool
+    text: str
+    file_id: str
+    original_filename: str
+    confidence: float | None = None
+    language: str | None = None
+    error: str | None = None
+    word_count: int | None = None
+    character_count: int | None = None
+
+class ChapterInfoFast(msgspec.Struct):
+    """Mirror of ChapterInfo"""
+    number: str
+    title: str
+    line: int
+
+class SectionInfoFast(msgspec.Struct):
+    """Mirror of SectionInfo"""
+    number: str
+    title: str
+    line: int
+
+class PageInfoFast(msgspec.Struct):
+    """Mirror of PageInfo"""
+    page: int
+    text_length: int
+    has_images: bool
+    error: str | None = None
+
+class PDFStructureFast(msgspec.Struct):
+    """Mirror of PDFStructure"""
+    chapters: tuple[ChapterInfoFast, ...] = ()
+    sections: tuple[SectionInfoFast, ...] = ()
+
+class PDFResponseFast(msgspec.Struct, kw_only=True):
+    """Mirror of PDFResponse"""
+    processed_at_ms: int = msgspec.field(default_factory=now_ms)
+    success: bool
+    file_id: str
+    original_filename: str
+    text: str
+    structure: PDFStructureFast
+    pages: list[PageInfoFast]
+    image_count: int
+    total_pages: int
+    next_page_cursor: str | None = None
+    error: str | None = None
+
+class PDFPagesResponseFast(msgspec.Struct):
+    """Mirror of PDFPagesResponse"""
+    file_id: str
+    pages: list[PageInfoFast]
+    next_page_cursor: str | None = None
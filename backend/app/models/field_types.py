@@ -0,0 +1,15 @@
+from pydantic import Field
+from typing import Annotated
+
+from app.models.base import MAX_TEXT_LENGTH, MAX_SHORT_TEXT_LENGTH
+
+# Annotated aliases for fields repeated across the API models. Each alias
+# carries one shared FieldInfo, so descriptions and limits live in one place
+# and pydantic applies the same metadata instead of one Field() per declaration.
+
+SuccessFlag = Annotated[bool, Field(description="Whether the processing was successful")]
+ErrorMessage = Annotated[str | None, Field(description="Error message if processing failed")]
+FileId = Annotated[str, Field(max_length=MAX_SHORT_TEXT_LENGTH, description="Unique identifier for the file")]
+OriginalFilename = Annotated[str, Field(description="Original filename of the uploaded file")]
+InputText = Annotated[str, Field(max_length=MAX_TEXT_LENGTH, description="Extracted text to process")]
+LanguageCode = Annotated[str | None, Field(max_length=MAX_SHORT_TEXT_LENGTH, description="Language code for OCR processing")]
@@ -1,19 +1,64 @@
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, List
-from datetime import datetime
+from pydantic import Field
 
-class ContentGenerationRequest(BaseModel):
+from app.models.base import AppModel, TimestampedResponse, MAX_SHORT_TEXT_LENGTH
+from app.models.field_types import SuccessFlag, ErrorMessage, InputText
+from app.models.pdf_models import ContentItem
+
+class ContentGenerationRequest(AppModel):
     """Request model for educational content generation"""
-    text: str = Field(..., description="OCR extracted text to generate content from")
-    topic: Optional[str] = Field(default=None, description="Topic or subject area")
+    text: InputText
+    topic: str | None = Field(default=None, max_length=MAX_SHORT_TEXT_LENGTH, description="Topic or subject area")
+    echo_input: bool = Field(default=False, description="Whether to echo the full input text back in the response")
+
+class StructureAnalysis(AppModel):
+    """Outline returned by the LLM structure-analysis prompt"""
+    main_chapter: str | None = Field(default=None, description="Main chapter or topic name")
+    subtopics: list[str] = Field(default_factory=list, description="Subtopics identified in the text")
+
+class IndexedStructureAnalysis(StructureAnalysis):
+    """Outline of one document in a batched structure-analysis response"""
+    doc_index: int = Field(..., description="Position of the document in the batched prompt")
+
+class CombinedContentItem(AppModel):
+    """One subtopic and its content in a combined generation response"""
+    subtopic: str = Field(default="", description="Subtopic name")
+    content: str = Field(default="", description="Generated content for the subtopic")
+
+class CombinedContent(AppModel):
+    """Outline plus per-subtopic content returned by the single-call generation prompt"""
+    main_chapter: str | None = Field(default=None, description="Main chapter or topic name")
+    items: list[CombinedContentItem] = Field(default_factory=list, description="Subtopics with their content")
+
+class ContentItemColumns(AppModel):
+    """Generated content items stored column-wise, one list per field"""
+    topics: list[str] = Field(default_factory=list, description="Main topic of each item")
+    subtopics: list[str] = Field(default_factory=list, description="Subtopic of each item")
+    contents: list[str] = Field(default_factory=list, description="Generated content of each item")
+    
+    @classmethod
+    def from_items(cls, items: list[dict[str, str]]) -> "ContentItemColumns":
+        """Build columns from topic/subtopic/content item dicts"""
+        return cls(
+            topics=[item['topic'] for item in items],
+            subtopics=[item['subtopic'] for item in items],
+            contents=[item['content'] for item in items]
+        )
+    
+    def to_aos(self) -> list[ContentItem]:
+        """Rebuild one ContentItem per row for consumers that want records"""
+        return [
+            ContentItem(topic=topic, subtopic=subtopic, content=content)
+            for topic, subtopic, content in zip(self.topics, self.subtopics, self.contents)
+        ]
 
-class ContentGenerationResponse(BaseModel):
+class ContentGenerationResponse(TimestampedResponse):
     """Response model for educational content generation"""
-    success: bool = Field(..., description="Whether the content generation was successful")
-    original_text: str = Field(..., description="Original OCR extracted text")
-    content_items: List[Dict[str, str]] = Field(..., description="Generated content items with topics and subtopics")
-    topic: Optional[str] = Field(default=None, description="Topic or subject area")
-    processed_at: datetime = Field(..., description="Timestamp when content generation was completed")
+    success: SuccessFlag
+    original_text: str | None = Field(None, description="Original OCR extracted text, only when echo_input was requested")
+    original_text_sha256: str = Field(..., description="SHA-256 hex digest of the original text")
+    original_text_length: int = Field(..., description="Length of the original text in characters")
+    content_items: ContentItemColumns = Field(..., description="Generated content items with topics and subtopics, column-wise")
+    topic: str | None = Field(default=None, description="Topic or subject area")
     processing_time: float = Field(..., description="Time taken for processing in seconds")
     total_items: int = Field(..., description="Total number of content items generated")
-    error: Optional[str] = Field(None, description="Error message if generation failed") 
\ No newline at end of file
+    error: ErrorMessage = None
\ No newline at end of file
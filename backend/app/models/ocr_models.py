@@ -1,33 +1,33 @@
-from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from pydantic import Field
 
-class OCRRequest(BaseModel):
+from app.models.base import AppModel, ResponseModel, TimestampedResponse
+from app.models.field_types import SuccessFlag, ErrorMessage, FileId, OriginalFilename, LanguageCode
+
+class OCRRequest(AppModel):
     """Request model for OCR processing"""
-    file_id: str = Field(..., description="Unique identifier for the uploaded file")
-    language: Optional[str] = Field(default="eng", description="Language code for OCR processing")
-    confidence_threshold: Optional[float] = Field(default=0.5, description="Minimum confidence threshold for text extraction")
+    file_id: FileId
+    language: LanguageCode = "eng"
+    confidence_threshold: float | None = Field(default=0.5, description="Minimum confidence threshold for text extraction")
 
-class OCRResponse(BaseModel):
+class OCRResponse(TimestampedResponse):
     """Response model for OCR processing"""
-    success: bool = Field(..., description="Whether the OCR processing was successful")
+    success: SuccessFlag
     text: str = Field(..., description="Extracted text from the image")
-    file_id: str = Field(..., description="Unique identifier for the processed file")
-    original_filename: str = Field(..., description="Original filename of the uploaded image")
-    processed_at: datetime = Field(..., description="Timestamp when processing was completed")
-    confidence: Optional[float] = Field(None, description="Overall confidence score of the OCR extraction")
-    language: Optional[str] = Field(None, description="Detected language of the text")
-    error: Optional[str] = Field(None, description="Error message if processing failed")
-    word_count: Optional[int] = Field(None, description="Number of words extracted")
-    character_count: Optional[int] = Field(None, description="Number of characters extracted")
+    file_id: FileId
+    original_filename: OriginalFilename
+    confidence: float | None = Field(None, description="Overall confidence score of the OCR extraction")
+    language: str | None = Field(None, description="Detected language of the text")
+    error: ErrorMessage = None
+    word_count: int | None = Field(None, description="Number of words extracted")
+    character_count: int | None = Field(None, description="Number of characters extracted")
 
-class OCRBatchRequest(BaseModel):
+class OCRBatchRequest(AppModel):
     """Request model for batch OCR processing"""
-    files: list[str] = Field(..., description="List of file IDs to process")
-    language: Optional[str] = Field(default="eng", description="Language code for OCR processing")
-    confidence_threshold: Optional[float] = Field(default=0.5, description="Minimum confidence threshold for text extraction")
+    files: list[str] = Field(..., max_length=10, description="List of file IDs to process")
+    language: LanguageCode = "eng"
+    confidence_threshold: float | None = Field(default=0.5, description="Minimum confidence threshold for text extraction")
 
-class OCRBatchResponse(BaseModel):
+class OCRBatchResponse(ResponseModel):
     """Response model for batch OCR processing"""
     results: list[OCRResponse] = Field(..., description="List of OCR results for each file")
     total_processed: int = Field(..., description="Total number of files processed")
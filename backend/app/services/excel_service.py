@@ -1,275 +1,300 @@
 import pandas as pd
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils.dataframe import dataframe_to_rows
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union, BinaryIO, Iterable, Iterator, Sequence
 import io
 import logging
+import math
+import re
 from datetime import datetime
-import json
+
+try:
+    import orjson as _json
+except ImportError:  # stdlib json parses the same input, just slower
+    import json as _json
 
 logger = logging.getLogger(__name__)
 
+# constant_memory streams each row to disk once the next row starts, so rows
+# must be written in order. Content is plain text, never formulas or links
+XLSX_OPTIONS = {
+    'constant_memory': True,
+    'strings_to_formulas': False,
+    'strings_to_urls': False
+}
+
+# Markdown code fence an LLM may wrap JSON in, with any surrounding whitespace
+_JSON_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$')
+
+# validate_data summarises an issue instead of listing items past this count
+MAX_LISTED_ISSUES = 100
+
+# Accepted keys per output column for dict items, first present key wins
+# even when its value is None
+_COLUMN_ALIASES = (
+    ('topic', 'Topic'),
+    ('subtopic', 'Subtopic'),
+    ('content', 'Content'),
+    ('video_link', 'Video Link', 'Video_Link')
+)
+# Records parsed from JSON strings only use the lowercase keys
+_JSON_RECORD_KEYS = tuple(aliases[0] for aliases in _COLUMN_ALIASES)
+
 class ExcelService:
     """Service for creating Excel files with structured content"""
     
+    # Cell formats, registered once per workbook from these specs
+    _FORMAT_SPECS = {
+        'header': {
+            'bold': True, 'font_color': '#FFFFFF', 'font_size': 12,
+            'bg_color': '#366092', 'pattern': 1,
+            'align': 'center', 'valign': 'vcenter', 'border': 1
+        },
+        'content': {
+            'font_size': 11, 'align': 'left', 'valign': 'top',
+            'text_wrap': True, 'border': 1
+        }
+    }
+    
+    # Widths of the leading columns: Topic, Subtopic, Content, Video Link
+    _COL_WIDTHS = (30, 25, 60, 20)
+    
     def __init__(self):
         self.headers = ['Topic', 'Subtopic', 'Content', 'Video Link']
     
-    def create_excel_file(self, data: List[Dict[str, Any]], filename: str = None, detailed_content: Dict[str, Any] = None) -> bytes:
+    def _excel_writer(self, target: Union[str, BinaryIO]) -> pd.ExcelWriter:
+        """Open a streaming xlsxwriter-backed ExcelWriter on a path or file object"""
+        return pd.ExcelWriter(target, engine='xlsxwriter', engine_kwargs={'options': XLSX_OPTIONS})
+    
+    def _add_formats(self, workbook) -> Dict[str, Any]:
+        """Register the shared cell formats on a workbook"""
+        return {name: workbook.add_format(spec) for name, spec in self._FORMAT_SPECS.items()}
+    
+    def create_excel_file(self, data: List[Dict[str, Any]], filename: str = None, detailed_content: Dict[str, Any] = None, output: Union[str, BinaryIO, None] = None) -> Optional[bytes]:
         """
         Create an Excel file with the structured content
+        
+        Writes to `output` (a path or binary file object) when given,
+        otherwise returns the workbook as bytes
         """
         try:
-            # Parse and clean the data using the new parsing function
-            cleaned_data = self.parse_json_data(data)
+            # Parse and clean the data straight into the sheet's DataFrame
+            df = self._parse_to_frame(data)
 
             # Add formulas as rows in the main content sheet with MathJax formatting
-            if detailed_content and detailed_content.get('formulas'):
-                logger.info(f"Processing {len(detailed_content['formulas'])} formulas for MathJax conversion")
-                for i, formula in enumerate(detailed_content['formulas']):
-                    logger.info(f"Formula {i+1}: {formula}")
-                    latex_content = formula.get('latex', '')
-                    if latex_content:
-                        # Format as MathJax for web rendering
-                        mathjax_content = f"$${latex_content}$$"
-                        logger.info(f"Converted to MathJax: {mathjax_content}")
-                    else:
-                        mathjax_content = formula.get('description', 'Formula')
-                        logger.info(f"No LaTeX found, using description: {mathjax_content}")
-                    
-                    cleaned_data.append({
-                        'Topic': formula.get('topic', 'Formula'),
-                        'Subtopic': formula.get('description', 'Formula'),
-                        'Content': mathjax_content,
-                        'Video Link': ''
-                    })
-            else:
-                logger.info("No formulas found in detailed_content")
-                if detailed_content:
-                    logger.info(f"Available content types: {list(detailed_content.keys())}")
-
-            # Create DataFrame with cleaned data
-            df = pd.DataFrame(cleaned_data)
-
-            # Ensure we have the required columns in the right order
-            required_columns = ['Topic', 'Subtopic', 'Content', 'Video Link']
-            for col in required_columns:
-                if col not in df.columns:
-                    df[col] = ''
-            df = df[required_columns]
+            df = self._append_formula_rows(df, detailed_content)
 
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Content', index=False)
+            target = output if output is not None else io.BytesIO()
+            with self._excel_writer(target) as writer:
                 workbook = writer.book
-                worksheet = writer.sheets['Content']
-                self._apply_formatting(worksheet, df)
+                formats = self._add_formats(workbook)
+                self._write_sheet(workbook, formats, 'Content', df)
                 if detailed_content:
-                    self._add_detailed_content_sheets(workbook, detailed_content)
-            output.seek(0)
-            return output.getvalue()
+                    self._add_detailed_content_sheets(workbook, formats, detailed_content)
+            if output is None:
+                return target.getvalue()
         except Exception as e:
             logger.error(f"Error creating Excel file: {str(e)}")
             raise
     
-    def _add_detailed_content_sheets(self, workbook, detailed_content: Dict[str, Any]):
+    def _append_formula_rows(self, df: pd.DataFrame, detailed_content: Optional[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Append formulas to the content sheet as MathJax rows
+        
+        Args:
+            df: Content sheet DataFrame
+            detailed_content: Detailed content, formulas are read from its 'formulas' key
+            
+        Returns:
+            DataFrame with one extra row per formula
+        """
+        formulas = detailed_content.get('formulas') if detailed_content else None
+        if not formulas:
+            logger.info("No formulas found in detailed_content")
+            if detailed_content:
+                logger.info(f"Available content types: {list(detailed_content.keys())}")
+            return df
+        
+        rows = self._formulas_to_rows(formulas)
+        latex_count = sum(1 for formula in formulas if formula.get('latex', ''))
+        logger.info(f"Added {len(formulas)} formula rows ({latex_count} converted to MathJax)")
+        
+        df_formulas = pd.DataFrame.from_records(rows, columns=self.headers)
+        return pd.concat([df, df_formulas], ignore_index=True)
+    
+    @staticmethod
+    def _formulas_to_rows(formulas: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """
+        Convert formulas to content rows, LaTeX is wrapped as MathJax for web rendering
+        
+        Args:
+            formulas: Formula dictionaries from the detailed content
+            
+        Returns:
+            One row per formula, falling back to the description when there is no LaTeX
+        """
+        latex = [formula.get('latex', '') for formula in formulas]
+        return [
+            {
+                'Topic': formula.get('topic', 'Formula'),
+                'Subtopic': formula.get('description', 'Formula'),
+                'Content': f"$${latex_content}$$" if latex_content else formula.get('description', 'Formula'),
+                'Video Link': ''
+            }
+            for formula, latex_content in zip(formulas, latex)
+        ]
+    
+    def _add_detailed_content_sheets(self, workbook, formats: Dict[str, Any], detailed_content: Dict[str, Any]):
         """Add detailed content sheets for tables, formulas, and diagrams"""
         try:
             # Tables sheet
             if detailed_content.get('tables'):
-                self._add_tables_sheet(workbook, detailed_content['tables'])
+                self._add_tables_sheet(workbook, formats, detailed_content['tables'])
             
             # Formulas sheet
             if detailed_content.get('formulas'):
-                self._add_formulas_sheet(workbook, detailed_content['formulas'])
+                self._add_formulas_sheet(workbook, formats, detailed_content['formulas'])
             
             # Diagrams sheet
             if detailed_content.get('diagrams'):
-                self._add_diagrams_sheet(workbook, detailed_content['diagrams'])
+                self._add_diagrams_sheet(workbook, formats, detailed_content['diagrams'])
                 
         except Exception as e:
             logger.error(f"Error adding detailed content sheets: {str(e)}")
     
-    def _add_tables_sheet(self, workbook, tables: List[Dict[str, Any]]):
+    def _add_tables_sheet(self, workbook, formats: Dict[str, Any], tables: List[Dict[str, Any]]):
         """Add tables to a separate sheet"""
         try:
-            # Create tables data
+            # Table columns vary, so the header is every column seen, in order of appearance
+            headers = {'Table_Number': None, 'Page': None}
             table_data = []
             for i, table in enumerate(tables):
                 if 'table_data' in table and table['table_data'].get('rows'):
                     for row in table['table_data']['rows']:
-                        row_data = {
-                            'Table_Number': i + 1,
-                            'Page': table.get('page', 'Unknown'),
-                            **row
-                        }
-                        table_data.append(row_data)
+                        headers.update(dict.fromkeys(row))
+                        table_data.append((i + 1, table.get('page', 'Unknown'), row))
             
             if table_data:
-                df_tables = pd.DataFrame(table_data)
-                df_tables.to_excel(workbook, sheet_name='Tables', index=False)
-                
-                # Format tables sheet
-                worksheet = workbook['Tables']
-                self._apply_formatting(worksheet, df_tables)
+                columns = list(headers)[2:]
+                rows = (
+                    (number, page, *(row.get(col) for col in columns))
+                    for number, page, row in table_data
+                )
+                self._write_rows(workbook, formats, 'Tables', list(headers), rows)
                 
         except Exception as e:
             logger.error(f"Error adding tables sheet: {str(e)}")
     
-    def _add_formulas_sheet(self, workbook, formulas: List[Dict[str, Any]]):
+    def _add_formulas_sheet(self, workbook, formats: Dict[str, Any], formulas: List[Dict[str, Any]]):
         """Add formulas to a separate sheet"""
         try:
-            formula_data = []
-            for i, formula in enumerate(formulas):
-                formula_data.append({
-                    'Formula_Number': i + 1,
-                    'Page': formula.get('page', 'Unknown'),
-                    'LaTeX': formula.get('latex', ''),
-                    'Description': formula.get('description', ''),
-                    'Variables': formula.get('variables', '')
-                })
-            
-            if formula_data:
-                df_formulas = pd.DataFrame(formula_data)
-                df_formulas.to_excel(workbook, sheet_name='Formulas', index=False)
-                
-                # Format formulas sheet
-                worksheet = workbook['Formulas']
-                self._apply_formatting(worksheet, df_formulas)
+            headers = ['Formula_Number', 'Page', 'LaTeX', 'Description', 'Variables']
+            rows = (
+                (
+                    i + 1,
+                    formula.get('page', 'Unknown'),
+                    formula.get('latex', ''),
+                    formula.get('description', ''),
+                    formula.get('variables', '')
+                )
+                for i, formula in enumerate(formulas)
+            )
+            self._write_rows(workbook, formats, 'Formulas', headers, rows)
                 
         except Exception as e:
             logger.error(f"Error adding formulas sheet: {str(e)}")
     
-    def _add_diagrams_sheet(self, workbook, diagrams: List[Dict[str, Any]]):
+    def _add_diagrams_sheet(self, workbook, formats: Dict[str, Any], diagrams: List[Dict[str, Any]]):
         """Add diagrams to a separate sheet"""
         try:
-            diagram_data = []
-            for i, diagram in enumerate(diagrams):
-                diagram_data.append({
-                    'Diagram_Number': i + 1,
-                    'Page': diagram.get('page', 'Unknown'),
-                    'Description': diagram.get('description', ''),
-                    'Content_Type': diagram.get('content_type', 'diagram')
-                })
-            
-            if diagram_data:
-                df_diagrams = pd.DataFrame(diagram_data)
-                df_diagrams.to_excel(workbook, sheet_name='Diagrams', index=False)
-                
-                # Format diagrams sheet
-                worksheet = workbook['Diagrams']
-                self._apply_formatting(worksheet, df_diagrams)
+            headers = ['Diagram_Number', 'Page', 'Description', 'Content_Type']
+            rows = (
+                (
+                    i + 1,
+                    diagram.get('page', 'Unknown'),
+                    diagram.get('description', ''),
+                    diagram.get('content_type', 'diagram')
+                )
+                for i, diagram in enumerate(diagrams)
+            )
+            self._write_rows(workbook, formats, 'Diagrams', headers, rows)
                 
         except Exception as e:
             logger.error(f"Error adding diagrams sheet: {str(e)}")
     
-    def _apply_formatting(self, worksheet, df):
-        """Apply formatting to the Excel worksheet"""
+    def _write_sheet(self, workbook, formats: Dict[str, Any], sheet_name: str, df: pd.DataFrame):
+        """Write a DataFrame to a new formatted worksheet"""
+        self._write_rows(workbook, formats, sheet_name, df.columns, df.itertuples(index=False, name=None))
+    
+    def _write_rows(self, workbook, formats: Dict[str, Any], sheet_name: str, headers: Iterable[Any], rows: Iterable[Sequence[Any]]):
+        """
+        Write a header and rows to a new formatted worksheet
+        
+        Rows are flushed as they are written, so column widths and the header
+        freeze are set up before any data goes out.
+        """
+        worksheet = workbook.add_worksheet(sheet_name)
+        
         try:
-            # Define styles
-            header_font = Font(bold=True, color="FFFFFF", size=12)
-            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            header_alignment = Alignment(horizontal="center", vertical="center")
-            
-            content_font = Font(size=11)
-            content_alignment = Alignment(horizontal="left", vertical="top", wrap_text=True)
-            
-            border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-            
-            # Format headers
-            for col in range(1, len(self.headers) + 1):
-                cell = worksheet.cell(row=1, column=col)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-                cell.border = border
+            headers = [str(h) for h in headers]
             
-            # Format content cells
-            for row in range(2, len(df) + 2):
-                for col in range(1, len(self.headers) + 1):
-                    cell = worksheet.cell(row=row, column=col)
-                    cell.font = content_font
-                    cell.alignment = content_alignment
-                    cell.border = border
+            # Freeze the header row
+            worksheet.freeze_panes(1, 0)
             
-            # Set column widths
-            column_widths = {
-                'A': 30,  # Topic
-                'B': 25,  # Subtopic
-                'C': 60,  # Content
-                'D': 20   # Video Link
-            }
+            # Body cells are styled per column, cells written without a format
+            # fall back to it, so only the header carries a cell-level format
+            for col in range(len(headers)):
+                width = self._COL_WIDTHS[col] if col < len(self._COL_WIDTHS) else None
+                worksheet.set_column(col, col, width, formats['content'])
             
-            for col, width in column_widths.items():
-                worksheet.column_dimensions[col].width = width
+            # Taller rows for better readability, set once as the sheet default
+            # instead of per row. The header keeps the standard height
+            worksheet.set_default_row(60)
+            worksheet.set_row(0, 15)
             
-            # Set row heights for better readability
-            for row in range(2, len(df) + 2):
-                worksheet.row_dimensions[row].height = 60
+            worksheet.write_row(0, 0, headers, formats['header'])
             
-            # Freeze the header row
-            worksheet.freeze_panes = "A2"
+            for row_idx, row in enumerate(rows, start=1):
+                worksheet.write_row(row_idx, 0, [self._cell_value(v) for v in row])
             
         except Exception as e:
-            logger.error(f"Error applying formatting: {str(e)}")
+            logger.error(f"Error writing sheet {sheet_name}: {str(e)}")
+    
+    @staticmethod
+    def _cell_value(value: Any) -> Any:
+        """Map a DataFrame value to something xlsxwriter can write (NaN becomes blank)"""
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        if value is None or isinstance(value, (str, int, float)):
+            return value
+        return str(value)
     
-    def create_advanced_excel(self, data: List[Dict[str, Any]], metadata: Dict[str, Any] = None, detailed_content: Dict[str, Any] = None) -> bytes:
+    def create_advanced_excel(self, data: List[Dict[str, Any]], metadata: Dict[str, Any] = None, detailed_content: Dict[str, Any] = None, output: Union[str, BinaryIO, None] = None) -> Optional[bytes]:
         """
         Create an advanced Excel file with multiple sheets and metadata
+        
+        Writes to `output` (a path or binary file object) when given,
+        otherwise returns the workbook as bytes
         """
         try:
-            output = io.BytesIO()
-            cleaned_data = self.parse_json_data(data)
+            target = output if output is not None else io.BytesIO()
+            df_content = self._parse_to_frame(data)
             # Add formulas as rows in the main content sheet with MathJax formatting
-            if detailed_content and detailed_content.get('formulas'):
-                logger.info(f"Advanced Excel: Processing {len(detailed_content['formulas'])} formulas for MathJax conversion")
-                for i, formula in enumerate(detailed_content['formulas']):
-                    logger.info(f"Advanced Excel: Formula {i+1}: {formula}")
-                    latex_content = formula.get('latex', '')
-                    if latex_content:
-                        # Format as MathJax for web rendering
-                        mathjax_content = f"$${latex_content}$$"
-                        logger.info(f"Advanced Excel: Converted to MathJax: {mathjax_content}")
-                    else:
-                        mathjax_content = formula.get('description', 'Formula')
-                        logger.info(f"Advanced Excel: No LaTeX found, using description: {mathjax_content}")
-                    
-                    cleaned_data.append({
-                        'Topic': formula.get('topic', 'Formula'),
-                        'Subtopic': formula.get('description', 'Formula'),
-                        'Content': mathjax_content,
-                        'Video Link': ''
-                    })
-            else:
-                logger.info("Advanced Excel: No formulas found in detailed_content")
-                if detailed_content:
-                    logger.info(f"Advanced Excel: Available content types: {list(detailed_content.keys())}")
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df_content = pd.DataFrame(cleaned_data)
-                required_columns = ['Topic', 'Subtopic', 'Content', 'Video Link']
-                for col in required_columns:
-                    if col not in df_content.columns:
-                        df_content[col] = ''
-                df_content = df_content[required_columns]
-                df_content.to_excel(writer, sheet_name='Content', index=False)
+            df_content = self._append_formula_rows(df_content, detailed_content)
+            with self._excel_writer(target) as writer:
+                workbook = writer.book
+                formats = self._add_formats(workbook)
+                self._write_sheet(workbook, formats, 'Content', df_content)
                 if metadata:
                     df_metadata = pd.DataFrame([metadata])
-                    df_metadata.to_excel(writer, sheet_name='Metadata', index=False)
+                    self._write_sheet(workbook, formats, 'Metadata', df_metadata)
                 summary_data = {
                     'Metric': [
                         'Total Topics', 'Total Subtopics', 'Total Content Items', 'Tables Found',
                         'Formulas Found', 'Diagrams Found', 'Generated Date'
                     ],
                     'Value': [
-                        len([item for item in cleaned_data if item.get('Topic')]),
-                        len([item for item in cleaned_data if item.get('Subtopic')]),
-                        len(cleaned_data),
+                        int(df_content['Topic'].ne('').sum()),
+                        int(df_content['Subtopic'].ne('').sum()),
+                        len(df_content),
                         metadata.get('content_breakdown', {}).get('tables', 0) if metadata else 0,
                         metadata.get('content_breakdown', {}).get('formulas', 0) if metadata else 0,
                         metadata.get('content_breakdown', {}).get('diagrams', 0) if metadata else 0,
@@ -277,23 +302,11 @@ class ExcelService:
                     ]
                 }
                 df_summary = pd.DataFrame(summary_data)
-                df_summary.to_excel(writer, sheet_name='Summary', index=False)
-                workbook = writer.book
-                for sheet_name in workbook.sheetnames:
-                    worksheet = workbook[sheet_name]
-                    if sheet_name == 'Content':
-                        df = df_content
-                    elif sheet_name == 'Metadata':
-                        df = df_metadata
-                    elif sheet_name == 'Summary':
-                        df = df_summary
-                    else:
-                        continue
-                    self._apply_formatting(worksheet, df)
+                self._write_sheet(workbook, formats, 'Summary', df_summary)
                 if detailed_content:
-                    self._add_detailed_content_sheets(workbook, detailed_content)
-            output.seek(0)
-            return output.getvalue()
+                    self._add_detailed_content_sheets(workbook, formats, detailed_content)
+            if output is None:
+                return target.getvalue()
         except Exception as e:
             logger.error(f"Error creating advanced Excel file: {str(e)}")
             raise
@@ -308,73 +321,73 @@ class ExcelService:
         Returns:
             List of properly formatted dictionaries for Excel
         """
-        parsed_data = []
+        return self._parse_to_frame(data).to_dict('records')
+    
+    def _parse_to_frame(self, data: List[Any]) -> pd.DataFrame:
+        """
+        Parse JSON data into a DataFrame with the Excel columns
         
+        Args:
+            data: List of data items (could be dicts, strings, or JSON strings)
+            
+        Returns:
+            DataFrame with the Topic, Subtopic, Content and Video Link columns, in order
+        """
+        # Records arrive as cell strings, so only the strip runs per column.
+        # Passing the known columns spares pandas the key-union scan
+        df = pd.DataFrame.from_records(self._iter_records(data), columns=self.headers)
+        for column in self.headers:
+            df[column] = df[column].str.strip()
+        
+        return df
+    
+    def _iter_records(self, data: List[Any]) -> Iterator[tuple]:
+        """Yield the unstripped cell strings for each data item, in column order"""
         for item in data:
-            # If item is a string that looks like JSON, try to parse it
             if isinstance(item, str):
-                try:
-                    # Clean the string
-                    cleaned_item = item.strip()
-                    if cleaned_item.startswith('```json'):
-                        cleaned_item = cleaned_item[7:]
-                    if cleaned_item.endswith('```'):
-                        cleaned_item = cleaned_item[:-3]
-                    cleaned_item = cleaned_item.strip()
-                    
-                    # Try to parse as JSON
-                    parsed = json.loads(cleaned_item)
-                    if isinstance(parsed, list):
-                        # If it's a list, process each item
-                        for list_item in parsed:
-                            if isinstance(list_item, dict):
-                                parsed_data.append({
-                                    'Topic': str(list_item.get('topic', '')).strip(),
-                                    'Subtopic': str(list_item.get('subtopic', '')).strip(),
-                                    'Content': str(list_item.get('content', '')).strip(),
-                                    'Video Link': str(list_item.get('video_link', '')).strip()
-                                })
-                    elif isinstance(parsed, dict):
-                        parsed_data.append({
-                            'Topic': str(parsed.get('topic', '')).strip(),
-                            'Subtopic': str(parsed.get('subtopic', '')).strip(),
-                            'Content': str(parsed.get('content', '')).strip(),
-                            'Video Link': str(parsed.get('video_link', '')).strip()
-                        })
-                    else:
-                        # If parsing fails, treat as content
-                        parsed_data.append({
-                            'Topic': '',
-                            'Subtopic': '',
-                            'Content': str(item).strip(),
-                            'Video Link': ''
-                        })
-                except:
-                    # If JSON parsing fails, treat as content
-                    parsed_data.append({
-                        'Topic': '',
-                        'Subtopic': '',
-                        'Content': str(item).strip(),
-                        'Video Link': ''
-                    })
+                for record in self._parse_json_string(item):
+                    yield tuple(str(record.get(key, '')) for key in _JSON_RECORD_KEYS)
             elif isinstance(item, dict):
-                # If item is already a dict, use it directly
-                parsed_data.append({
-                    'Topic': str(item.get('topic', item.get('Topic', ''))).strip(),
-                    'Subtopic': str(item.get('subtopic', item.get('Subtopic', ''))).strip(),
-                    'Content': str(item.get('content', item.get('Content', ''))).strip(),
-                    'Video Link': str(item.get('video_link', item.get('Video Link', item.get('Video_Link', '')))).strip()
-                })
+                yield tuple(str(self._first_present(item, aliases)) for aliases in _COLUMN_ALIASES)
             else:
                 # Fallback for any other type
-                parsed_data.append({
-                    'Topic': '',
-                    'Subtopic': '',
-                    'Content': str(item).strip(),
-                    'Video Link': ''
-                })
+                yield ('', '', str(item), '')
+    
+    @staticmethod
+    def _first_present(item: Dict[str, Any], aliases: Sequence[str]) -> Any:
+        """Value of the first alias present in item, '' if none is"""
+        for alias in aliases:
+            if alias in item:
+                return item[alias]
+        return ''
+    
+    def _parse_json_string(self, item: str) -> List[Dict[str, Any]]:
+        """
+        Parse a string item that may hold a JSON object or array
         
-        return parsed_data
+        Args:
+            item: Raw string, optionally wrapped in a ```json fence
+            
+        Returns:
+            Raw records for the item, non-JSON text becomes a content-only record
+        """
+        cleaned_item = _JSON_FENCE_RE.sub('', item)
+        
+        # Only objects and arrays become rows, so don't try to parse anything else
+        if cleaned_item.lstrip()[:1] not in ('{', '['):
+            return [{'content': item}]
+        
+        try:
+            parsed = _json.loads(cleaned_item)
+        except ValueError:
+            # If JSON parsing fails, treat as content
+            return [{'content': item}]
+        
+        if isinstance(parsed, list):
+            return [list_item for list_item in parsed if isinstance(list_item, dict)]
+        if isinstance(parsed, dict):
+            return [parsed]
+        return [{'content': item}]
 
     def validate_data(self, data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -386,40 +399,43 @@ class ExcelService:
         Returns:
             Validation result
         """
-        validation_result = {
-            'valid': True,
-            'errors': [],
-            'warnings': [],
+        df = pd.DataFrame.from_records(data, columns=self.headers)
+        
+        # Truthiness of each field, same as checking item.get(field)
+        present = {col: df[col].fillna('').astype(object).astype(bool) for col in self.headers}
+        
+        warnings = (
+            self._issue_messages(~present['Topic'], 'Missing Topic')
+            + self._issue_messages(~present['Subtopic'], 'Missing Subtopic')
+        )
+        errors = self._issue_messages(~present['Content'], 'Missing Content')
+        
+        return {
+            'valid': not errors,
+            'errors': errors,
+            'warnings': warnings,
             'stats': {
-                'total_items': len(data),
-                'items_with_topic': 0,
-                'items_with_subtopic': 0,
-                'items_with_content': 0,
-                'items_with_video_link': 0
+                'total_items': len(df),
+                'items_with_topic': int(present['Topic'].sum()),
+                'items_with_subtopic': int(present['Subtopic'].sum()),
+                'items_with_content': int(present['Content'].sum()),
+                'items_with_video_link': int(present['Video Link'].sum())
             }
         }
+    
+    @staticmethod
+    def _issue_messages(mask: pd.Series, issue: str) -> List[str]:
+        """
+        Describe the items flagged by a validation mask
         
-        for i, item in enumerate(data):
-            # Check required fields
-            if not item.get('Topic'):
-                validation_result['warnings'].append(f"Item {i+1}: Missing Topic")
-            else:
-                validation_result['stats']['items_with_topic'] += 1
-            
-            if not item.get('Subtopic'):
-                validation_result['warnings'].append(f"Item {i+1}: Missing Subtopic")
-            else:
-                validation_result['stats']['items_with_subtopic'] += 1
-            
-            if not item.get('Content'):
-                validation_result['errors'].append(f"Item {i+1}: Missing Content")
-            else:
-                validation_result['stats']['items_with_content'] += 1
+        Args:
+            mask: Boolean Series, True for each item with the issue
+            issue: Description of the issue
             
-            if item.get('Video Link'):
-                validation_result['stats']['items_with_video_link'] += 1
-        
-        if validation_result['errors']:
-            validation_result['valid'] = False
-        
-        return validation_result 
\ No newline at end of file
+        Returns:
+            One message per flagged item, or a single summary once there are too many
+        """
+        count = int(mask.sum())
+        if count >= MAX_LISTED_ISSUES:
+            return [f"{count} items: {issue}"]
+        return [f"Item {i+1}: {issue}" for i in mask.to_numpy().nonzero()[0]]
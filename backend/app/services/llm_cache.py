@@ -0,0 +1,53 @@
+from cachetools import TTLCache
+from typing import Any, Dict, Optional
+import hashlib
+import json
+
+from app.core.config import settings
+
+class LLMCache:
+    """In-process TTL cache for LLM results, keyed by input text and task parameters"""
+    
+    def __init__(self, maxsize: int = None, ttl: float = None):
+        self._cache = TTLCache(
+            maxsize=maxsize or settings.LLM_CACHE_MAXSIZE,
+            ttl=ttl or settings.LLM_CACHE_TTL
+        )
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(text: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Build a cache key from the input text and the parameters that shape the result
+        
+        Runs of whitespace are collapsed first, so OCR output of the same page
+        that differs only in spacing or line breaks shares an entry.
+        
+        Args:
+            text: Input text sent to the LLM
+            params: Task parameters (topic, model, ...)
+        
+        Returns:
+            Hex SHA-256 digest
+        """
+        payload = json.dumps(params or {}, sort_keys=True, default=str)
+        normalized = " ".join(text.split())
+        return hashlib.sha256(f"{payload}\x00{normalized}".encode()).hexdigest()
+    
+    async def get(self, text: str, params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """Return the cached result for this input, or None"""
+        value = self._cache.get(self.make_key(text, params))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+    
+    async def set(self, text: str, params: Optional[Dict[str, Any]], value: Any) -> None:
+        """Store a result for this input"""
+        self._cache[self.make_key(text, params)] = value
+    
+    def stats(self) -> Dict[str, int]:
+        """Lookup counters since the cache was created"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
\ No newline at end of file
@@ -1,42 +1,215 @@
 import openai
 import asyncio
+import re
 import time
-from typing import Dict, Any, List, Optional
+from itertools import islice
+from typing import Dict, Any, List, Optional, Tuple, Iterator, AsyncIterator
 import logging
-import json
-import google.generativeai as genai
-from datetime import datetime
-import requests
+import httpx
+import orjson
+
+from pydantic import ValidationError
 
 from app.core.config import settings
+from app.models.base import validated, now_ms
+from app.models.llm_models import StructureAnalysis, IndexedStructureAnalysis, CombinedContent
+from app.services.llm_cache import LLMCache
 
 logger = logging.getLogger(__name__)
 
+# Caps in-flight provider calls across every LLMService instance in the process
+_llm_semaphore = asyncio.Semaphore(settings.LLM_CONCURRENCY)
+
+GEMINI_STREAM_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:streamGenerateContent"
+
+# Sent with every Gemini request, same sampling temperature as the OpenAI fallback
+GEMINI_GENERATION_CONFIG = {"temperature": 0.3}
+
+# Completion parameters for the OpenAI fallback
+OPENAI_COMPLETION_PARAMS = {"max_tokens": 1000, "temperature": 0.3}
+
+# JSON mode variants for prompts that must answer with a single JSON object.
+# The combined outline + content answer needs more room than one subtopic
+GEMINI_JSON_GENERATION_CONFIG = {**GEMINI_GENERATION_CONFIG, "responseMimeType": "application/json"}
+OPENAI_JSON_COMPLETION_PARAMS = {**OPENAI_COMPLETION_PARAMS, "max_tokens": 3000, "response_format": {"type": "json_object"}}
+
+# Simple patterns to identify potential formulas, fused into one alternation
+# so the text is scanned once
+_FORMULA_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in (
+    r'[A-Z]\([a-z]\)\s*=\s*[^.!?]+',  # P(z) = ...
+    r'[a-zA-Z]_{[^}]+}',  # a_{n}
+    r'\\[a-zA-Z]+',  # LaTeX commands
+    r'[a-zA-Z]\^[0-9]+',  # x^2
+    r'√[^.!?]+',  # Square roots
+)))
+
+# Characters of input text quoted in the analysis prompts (reduced from 3000)
+PROMPT_TEXT_LENGTH = 2000
+
+# Characters of source text quoted in each subtopic prompt, and how many of them
+# come before the subtopic's first mention
+SUBTOPIC_CONTEXT_LENGTH = 1000
+SUBTOPIC_CONTEXT_LEAD = 200
+
+# Words in a subtopic name long enough to locate it in the source text
+_KEYWORD_RE = re.compile(r'\w{4,}')
+
+# Stripped texts shorter than this are rejected without calling the LLM
+MIN_CONTENT_TEXT_LENGTH = 10
+INPUT_TOO_SHORT_ERROR = "Input text too short to generate content"
+
+# Opening brackets where a JSON value embedded in prose may start
+_OPEN_BRACKET_RE = re.compile(r'[\[{]')
+# Opening brackets tried as embedded JSON starts, each costs a scan to the end
+# of the response at worst, so recovery stays linear in the response length
+MAX_EMBEDDED_JSON_CANDIDATES = 8
+
+# Texts outlined per structure-analysis prompt in generate_educational_content_batch
+STRUCTURE_BATCH_SIZE = 8
+
+# Texts whose subtopic content generate_educational_content_batch generates at
+# once, each fans out to up to 6 calls
+BATCH_CONTENT_CONCURRENCY = 2
+
+def _balanced_json_end(text: str, start: int) -> Optional[int]:
+    """
+    Find where the JSON object or array opening at text[start] closes
+    
+    Brackets inside JSON strings are skipped.
+    
+    Args:
+        text: LLM response that may wrap JSON in prose
+        start: Index of an opening bracket
+        
+    Returns:
+        Index of the matching closing bracket, or None if it never closes
+    """
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '[{':
+            depth += 1
+        elif char in ']}':
+            depth -= 1
+            if depth == 0:
+                return i
+    return None
+
+def _iter_embedded_json(text: str) -> Iterator[str]:
+    """
+    Yield each balanced bracketed span in text, left to right
+    
+    Each of the first MAX_EMBEDDED_JSON_CANDIDATES opening brackets starts
+    a candidate, so a bracket in the surrounding prose (e.g. "[see note]")
+    or one that never closes does not hide a JSON value that comes after
+    it or is nested inside it.
+    
+    Args:
+        text: LLM response that may wrap JSON in prose
+        
+    Returns:
+        Iterator over candidate JSON substrings
+    """
+    for match in islice(_OPEN_BRACKET_RE.finditer(text), MAX_EMBEDDED_JSON_CANDIDATES):
+        end = _balanced_json_end(text, match.start())
+        if end is not None:
+            yield text[match.start():end + 1]
+
+def _parse_llm_json(cls: Any, response: str) -> Any:
+    """
+    Validate JSON from an LLM response, tolerating code fences and surrounding prose
+    
+    Args:
+        cls: Model class or type to validate against
+        response: Raw LLM response text
+        
+    Returns:
+        Validated instance of cls
+    """
+    cleaned_response = response.strip()
+    # Well-formed responses start straight with the JSON value, skip fence removal
+    if cleaned_response[:1] not in ('{', '['):
+        cleaned_response = cleaned_response.removeprefix('```json').removeprefix('```').removesuffix('```').strip()
+    
+    try:
+        return validated(cls, cleaned_response)
+    except ValidationError as error:
+        # The model may have wrapped the JSON in explanation, retry on each
+        # embedded value until one validates
+        for embedded in _iter_embedded_json(cleaned_response):
+            if embedded == cleaned_response:
+                continue
+            try:
+                return validated(cls, embedded)
+            except ValidationError:
+                continue
+        raise error
+
 class LLMService:
     """Simplified service for LLM text processing and educational content generation"""
     
     def __init__(self):
-        # Configure OpenAI client
-        if settings.OPENAI_API_KEY:
-            openai.api_key = settings.OPENAI_API_KEY
-        else:
-            logger.warning("OpenAI API key not configured")
-        
-        # Configure Gemini client
+        # Configure Gemini, called over its REST API on a pooled client so
+        # TLS connections stay warm between calls. MathPix shares the client
         if settings.GEMINI_API_KEY:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self.gemini_model = genai.GenerativeModel(settings.GEMINI_MODEL)
+            self.gemini_model = settings.GEMINI_MODEL
         else:
             self.gemini_model = None
             logger.warning("Gemini API key not configured")
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            timeout=60.0
+        )
+        
+        # Configure OpenAI client, async so calls don't block the event loop.
+        # It shares the pooled HTTP client
+        if settings.OPENAI_API_KEY:
+            self.openai_client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY, http_client=self._http)
+        else:
+            self.openai_client = None
+            logger.warning("OpenAI API key not configured")
+        
+        # Deterministic provider responses keyed by model, sampling settings and
+        # prompt, so repeated outline prompts skip the API
+        self.response_cache = LLMCache()
         
         # Rate limiting
         self.last_gemini_call = 0
         self.gemini_calls_this_minute = 0
         self.minute_start = time.time()
     
-    def _check_gemini_rate_limit(self) -> bool:
-        """Check if we can make a Gemini API call without hitting rate limits"""
+    async def aclose(self):
+        """Close the pooled HTTP client"""
+        logger.info(f"LLM response cache stats: {self.response_cache.stats()}")
+        await self._http.aclose()
+    
+    async def __aenter__(self) -> "LLMService":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
+    async def _reserve_gemini_call(self) -> bool:
+        """
+        Reserve a Gemini call within the rate limits, waiting for its slot
+        
+        The slot is taken before waiting, so concurrent callers each see
+        the calls reserved ahead of them and are spaced 2 seconds apart.
+        
+        Returns:
+            False if the per-minute budget is used up and OpenAI should be used
+        """
         current_time = time.time()
         
         # Reset counter if a minute has passed
@@ -50,16 +223,14 @@ class LLMService:
             return False
         
         # Add minimum delay between calls
-        if current_time - self.last_gemini_call < 2:  # 2 second minimum delay
-            time.sleep(2 - (current_time - self.last_gemini_call))
+        self.gemini_calls_this_minute += 1
+        slot = max(current_time, self.last_gemini_call + 2)  # 2 second minimum delay
+        self.last_gemini_call = slot
+        if slot > current_time:
+            await asyncio.sleep(slot - current_time)
         
         return True
     
-    def _increment_gemini_calls(self):
-        """Increment the Gemini call counter"""
-        self.gemini_calls_this_minute += 1
-        self.last_gemini_call = time.time()
-    
     async def generate_educational_content(self, text: str, topic: str = None) -> Dict[str, Any]:
         """
         Generate educational content from OCR extracted text - optimized for speed
@@ -67,33 +238,208 @@ class LLMService:
         Args:
             text: OCR extracted text
             topic: Topic or subject area (optional)
-            
+        
         Returns:
             Dictionary containing generated content and metadata
         """
+        # Nothing to outline in empty or near-empty text, skip the LLM entirely
+        if not self._has_enough_text(text):
+            return self._failed_result(text, INPUT_TOO_SHORT_ERROR)
+        
         try:
             start_time = time.time()
             
-            # Limit text length for faster processing
-            max_text_length = 2000  # Reduced from 3000
-            processed_text = text[:max_text_length]
+            processed_text = await self._prepare_text(text)
             
-            # Quick content type detection
-            is_math_content = any(keyword in text.lower() for keyword in [
-                'equation', 'formula', 'theorem', 'proof', 'mathematics', 'algebra', 
-                'calculus', 'geometry', 'trigonometry', 'complex', 'polynomial'
-            ])
+            # One call for the outline and all subtopic content
+            combined = await self._generate_combined_content(processed_text, topic)
+            if combined is not None:
+                return self._content_result(text, *combined, start_time)
             
-            # Convert formulas to MathJax only for mathematical content
-            if is_math_content:
-                processed_text = await self._convert_formulas_with_mathpix(processed_text)
+            # Only outline when the combined answer is unusable, so a successful
+            # request spends a single rate-limit slot
+            structure = await self._analyze_structure(text[:PROMPT_TEXT_LENGTH], topic)
+        except Exception as e:
+            logger.error(f"Error generating educational content: {str(e)}")
+            return self._failed_result(text, str(e))
+        
+        return await self._generate_from_structure(text, processed_text, topic, structure, start_time)
+    
+    async def generate_educational_content_batch(self, texts: List[str], topics: List[Optional[str]]) -> List[Dict[str, Any]]:
+        """
+        Generate educational content for several texts, analysing the structure
+        of up to STRUCTURE_BATCH_SIZE texts per LLM call
+        
+        Args:
+            texts: OCR extracted texts
+            topics: Topic for each text (entries may be None)
+        
+        Returns:
+            One result dictionary per text, in input order, shaped like
+            generate_educational_content results
+        """
+        start_time = time.time()
+        results = [
+            None if self._has_enough_text(text) else self._failed_result(text, INPUT_TOO_SHORT_ERROR)
+            for text in texts
+        ]
+        pending = [index for index, result in enumerate(results) if result is None]
+        pending_texts = [texts[index] for index in pending]
+        pending_topics = [topics[index] for index in pending]
+        text_heads = [text[:PROMPT_TEXT_LENGTH] for text in pending_texts]
+        batches = [slice(offset, offset + STRUCTURE_BATCH_SIZE) for offset in range(0, len(pending), STRUCTURE_BATCH_SIZE)]
+        
+        # Outlines are analysed on the raw text, overlapping with formula conversion
+        processed_texts, batched_structures = await asyncio.gather(
+            asyncio.gather(*(self._prepare_text(text) for text in pending_texts)),
+            asyncio.gather(*(self._analyze_structure_batch(text_heads[batch], pending_topics[batch]) for batch in batches))
+        )
+        structures = [structure for batch_structures in batched_structures for structure in batch_structures]
+        
+        # Expand a few texts at a time, so a long PDF doesn't queue a
+        # chapters x subtopics burst of calls at once
+        expand_slots = asyncio.Semaphore(BATCH_CONTENT_CONCURRENCY)
+        
+        async def expand(text: str, processed_text: str, topic: Optional[str], structure: Optional[StructureAnalysis]) -> Dict[str, Any]:
+            async with expand_slots:
+                return await self._generate_from_structure(text, processed_text, topic, structure, start_time)
+        
+        generated = await asyncio.gather(*(
+            expand(text, processed_text, topic, structure)
+            for text, processed_text, topic, structure in zip(pending_texts, processed_texts, pending_topics, structures)
+        ))
+        for index, result in zip(pending, generated):
+            results[index] = result
+        return results
+    
+    @staticmethod
+    def _has_enough_text(text: Optional[str]) -> bool:
+        """Whether text is long enough to be worth an LLM call"""
+        return len((text or "").strip()) >= MIN_CONTENT_TEXT_LENGTH
+    
+    async def _prepare_text(self, text: str) -> str:
+        """Trim text for the prompts and convert formulas in mathematical content"""
+        # Limit text length for faster processing
+        processed_text = text[:PROMPT_TEXT_LENGTH]
+        
+        # Quick content type detection
+        is_math_content = any(keyword in text.lower() for keyword in [
+            'equation', 'formula', 'theorem', 'proof', 'mathematics', 'algebra',
+            'calculus', 'geometry', 'trigonometry', 'complex', 'polynomial'
+        ])
+        
+        # Convert formulas to MathJax only for mathematical content
+        if is_math_content:
+            processed_text = await self._convert_formulas_with_mathpix(processed_text)
+        
+        return processed_text
+    
+    async def _call_llm(self, prompt: str, timeout: float = 30.0, json_mode: bool = False, deterministic: bool = False) -> str:
+        """
+        Send a prompt to Gemini, falling back to OpenAI when Gemini is
+        unavailable or rate limited
+        
+        Args:
+            prompt: Input prompt
+            timeout: Seconds to wait for the provider, not counting time
+                queued for a rate-limit slot or a concurrency permit
+            json_mode: Ask the provider to answer with a JSON object
+            deterministic: Sample at temperature 0, which also makes the answer cacheable
             
-            # Simplified, faster analysis prompt
-            analysis_prompt = f"""
-            Quickly analyze this educational text and identify 5-7 specific subtopics.
+        Returns:
+            Response text
+            
+        Raises:
+            asyncio.TimeoutError: If the provider takes longer than timeout
+        """
+        if self.gemini_model and await self._reserve_gemini_call():
+            try:
+                return await self._call_gemini(prompt, json_mode, timeout, deterministic)
+            except Exception as gemini_error:
+                if ("429" in str(gemini_error) or "quota" in str(gemini_error).lower()) and settings.OPENAI_API_KEY:
+                    logger.warning("Gemini rate limit hit, falling back to OpenAI")
+                    return await self._call_openai(prompt, json_mode, timeout, deterministic)
+                raise
+        
+        return await self._call_openai(prompt, json_mode, timeout, deterministic)
+    
+    @staticmethod
+    def _default_structure(topic: Optional[str]) -> StructureAnalysis:
+        """Generic outline used when structure analysis times out"""
+        return StructureAnalysis(
+            main_chapter=topic or 'General Content',
+            subtopics=["Introduction", "Main Concepts", "Key Definitions", "Important Processes", "Applications"]
+        )
+    
+    async def _generate_combined_content(self, processed_text: str, topic: Optional[str]) -> Optional[Tuple[str, List[Dict[str, str]]]]:
+        """
+        Ask the LLM for the outline of a text and the content of each subtopic in one call
+        
+        Args:
+            processed_text: Trimmed, formula-converted text
+            topic: Topic or subject area (optional)
+        
+        Returns:
+            Main chapter and content items, or None if the answer is unusable
+            (timeout, truncated or invalid JSON, fewer than 3 subtopics)
+        """
+        combined_prompt = f"""
+            Analyze this educational text, identify 5-6 specific subtopics and write
+            brief educational content for each of them.
             
             Text: {processed_text}
             
+            Return JSON:
+            {{
+                "main_chapter": "Chapter name",
+                "items": [
+                    {{"subtopic": "Subtopic 1", "content": "Content for subtopic 1"}},
+                    {{"subtopic": "Subtopic 2", "content": "Content for subtopic 2"}}
+                ]
+            }}
+            
+            Guidelines:
+            - Identify specific, concrete subtopics: main concepts, definitions, processes
+            - Keep subtopic names concise and clear
+            - Write 2-3 concise paragraphs (100-200 words) per subtopic
+            - Use clear, simple language and include key points and examples
+            """
+        
+        try:
+            response = await self._call_llm(combined_prompt, timeout=60.0, json_mode=True)
+            combined = _parse_llm_json(CombinedContent, response)
+        except asyncio.TimeoutError:
+            logger.warning("Combined content generation timed out, generating subtopics separately")
+            return None
+        except Exception as e:
+            logger.warning(f"Combined content generation failed, generating subtopics separately: {str(e)}")
+            return None
+        
+        items = [item for item in combined.items if item.subtopic and item.content]
+        if len(items) < 3:
+            logger.warning(f"Combined content generation returned {len(items)} subtopics, generating subtopics separately")
+            return None
+        
+        main_chapter = combined.main_chapter or topic or 'General Content'
+        content_items = [
+            {'topic': main_chapter, 'subtopic': item.subtopic, 'content': item.content.strip()}
+            for item in items[:6]
+        ]
+        return main_chapter, content_items
+    
+    async def _analyze_structure(self, text_head: str, topic: Optional[str]) -> Optional[StructureAnalysis]:
+        """
+        Ask the LLM for the main chapter and subtopics of one text
+        
+        Returns:
+            Parsed outline, or None if the response could not be parsed
+        """
+        # Simplified, faster analysis prompt
+        analysis_prompt = f"""
+            Quickly analyze this educational text and identify 5-7 specific subtopics.
+            
+            Text: {text_head}
+            
             Return JSON:
             {{
                 "main_chapter": "Chapter name",
@@ -106,136 +452,111 @@ class LLMService:
             - Keep subtopic names concise and clear
             - Aim for 5-7 subtopics maximum
             """
+        
+        # Get structure analysis with timeout
+        try:
+            structure_response = await self._call_llm(analysis_prompt, deterministic=True)
+        except asyncio.TimeoutError:
+            logger.warning("Structure analysis timed out, using fallback")
+            return self._default_structure(topic)
+        
+        try:
+            return _parse_llm_json(StructureAnalysis, structure_response)
+        except ValidationError as e:
+            logger.warning(f"Structure parsing failed: {str(e)}")
+            return None
+    
+    async def _analyze_structure_batch(self, text_heads: List[str], topics: List[Optional[str]]) -> List[Optional[StructureAnalysis]]:
+        """
+        Ask the LLM for the outlines of several texts in one prompt
+        
+        Texts missing from the batched response, or a batch call that fails,
+        fall back to one single-text analysis each.
+        
+        Returns:
+            One outline (or None) per text, in input order
+        """
+        if len(text_heads) == 1:
+            return [await self._analyze_structure(text_heads[0], topics[0])]
+        
+        documents = "\n\n".join(
+            f"Document {index}:\n{text_head}"
+            for index, text_head in enumerate(text_heads)
+        )
+        analysis_prompt = f"""
+            Quickly analyze each of these educational texts and identify 5-7 specific subtopics for each.
+            
+            {documents}
+            
+            Return a JSON array with one object per document:
+            [
+                {{
+                    "doc_index": 0,
+                    "main_chapter": "Chapter name",
+                    "subtopics": ["Subtopic 1", "Subtopic 2", "Subtopic 3", "Subtopic 4", "Subtopic 5"]
+                }}
+            ]
             
-            # Get structure analysis with timeout
-            try:
-                if self.gemini_model and self._check_gemini_rate_limit():
-                    try:
-                        structure_response = await asyncio.wait_for(
-                            self._call_gemini(analysis_prompt), 
-                            timeout=30.0  # 30 second timeout
-                        )
-                        self._increment_gemini_calls()
-                    except Exception as gemini_error:
-                        if "429" in str(gemini_error) or "quota" in str(gemini_error).lower():
-                            logger.warning("Gemini rate limit hit, falling back to OpenAI")
-                            if settings.OPENAI_API_KEY:
-                                structure_response = await asyncio.wait_for(
-                                    self._call_openai(analysis_prompt), 
-                                    timeout=30.0
-                                )
-                            else:
-                                raise gemini_error
-                        else:
-                            raise gemini_error
-                else:
-                    structure_response = await asyncio.wait_for(
-                        self._call_openai(analysis_prompt), 
-                        timeout=30.0
-                    )
-            except asyncio.TimeoutError:
-                logger.warning("Structure analysis timed out, using fallback")
-                structure_response = '{"main_chapter": "' + (topic or 'General Content') + '", "subtopics": ["Introduction", "Main Concepts", "Key Definitions", "Important Processes", "Applications"]}'
-            
-            # Parse structure
-            try:
-                cleaned_structure = structure_response.strip()
-                if cleaned_structure.startswith('```json'):
-                    cleaned_structure = cleaned_structure[7:]
-                if cleaned_structure.endswith('```'):
-                    cleaned_structure = cleaned_structure[:-3]
-                cleaned_structure = cleaned_structure.strip()
-                
-                structure_data = json.loads(cleaned_structure)
-                main_chapter = structure_data.get('main_chapter', topic or 'General Content')
-                subtopics = structure_data.get('subtopics', [])
-                
-                # Ensure we have subtopics
-                if not subtopics or len(subtopics) < 3:
-                    subtopics = await self._generate_quick_subtopics(processed_text, main_chapter)
-                    
-            except Exception as e:
-                logger.warning(f"Structure parsing failed: {str(e)}")
-                main_chapter = topic or 'General Content'
+            Guidelines:
+            - Identify specific, concrete subtopics
+            - Focus on main concepts, definitions, processes, or topics
+            - Keep subtopic names concise and clear
+            - Aim for 5-7 subtopics maximum per document
+            """
+        
+        try:
+            structure_response = await self._call_llm(analysis_prompt, deterministic=True)
+            by_index = {
+                item.doc_index: item
+                for item in _parse_llm_json(List[IndexedStructureAnalysis], structure_response)
+            }
+        except asyncio.TimeoutError:
+            logger.warning("Batched structure analysis timed out, using fallback")
+            return [self._default_structure(topic) for topic in topics]
+        except Exception as e:
+            logger.warning(f"Batched structure analysis failed, analysing texts one by one: {str(e)}")
+            by_index = {}
+        
+        return list(await asyncio.gather(*(
+            self._structure_or_analyze(by_index.get(index), text_head, topic)
+            for index, (text_head, topic) in enumerate(zip(text_heads, topics))
+        )))
+    
+    async def _structure_or_analyze(self, structure: Optional[StructureAnalysis], text_head: str, topic: Optional[str]) -> Optional[StructureAnalysis]:
+        """Return a batched outline, or analyse the text on its own if there is none"""
+        if structure is not None:
+            return structure
+        return await self._analyze_structure(text_head, topic)
+    
+    async def _generate_from_structure(self, text: str, processed_text: str, topic: Optional[str],
+                                       structure: Optional[StructureAnalysis], start_time: float) -> Dict[str, Any]:
+        """
+        Generate subtopic content for a text whose outline is already known
+        
+        Args:
+            text: Original OCR extracted text
+            processed_text: Trimmed, formula-converted text used in prompts
+            topic: Topic or subject area (optional)
+            structure: Outline from structure analysis, None if it could not be parsed
+            start_time: When processing of this text started
+        
+        Returns:
+            Dictionary containing generated content and metadata
+        """
+        try:
+            main_chapter = (structure and structure.main_chapter) or topic or 'General Content'
+            subtopics = structure.subtopics if structure else []
+            
+            # Ensure we have subtopics
+            if len(subtopics) < 3:
                 subtopics = await self._generate_quick_subtopics(processed_text, main_chapter)
             
-            # Generate content for each subtopic with timeout
-            content_items = []
-            
-            for i, subtopic in enumerate(subtopics):
-                # Skip if we already have enough content items
-                if len(content_items) >= 6:
-                    break
-                
-                # Add delay between calls to prevent rate limiting
-                if i > 0:
-                    await asyncio.sleep(1)  # 1 second delay between calls
-                    
-                # Simplified, faster content prompt
-                content_prompt = f"""
-                Create brief educational content for "{subtopic}" based on this text.
-                
-                Chapter: {main_chapter}
-                Subtopic: {subtopic}
-                Text: {processed_text[:1000]}  # Reduced text length
-                
-                Guidelines:
-                - Write 2-3 concise paragraphs (100-200 words)
-                - Focus only on this specific subtopic
-                - Use clear, simple language
-                - Include key points and examples
-                - Keep it educational but brief
-                """
-                
-                try:
-                    if self.gemini_model and self._check_gemini_rate_limit():
-                        try:
-                            content_response = await asyncio.wait_for(
-                                self._call_gemini(content_prompt), 
-                                timeout=45.0  # 45 second timeout per subtopic
-                            )
-                            self._increment_gemini_calls()
-                        except Exception as gemini_error:
-                            if "429" in str(gemini_error) or "quota" in str(gemini_error).lower():
-                                logger.warning(f"Gemini rate limit hit for subtopic {subtopic}, falling back to OpenAI")
-                                if settings.OPENAI_API_KEY:
-                                    content_response = await asyncio.wait_for(
-                                        self._call_openai(content_prompt), 
-                                        timeout=45.0
-                                    )
-                                else:
-                                    raise gemini_error
-                            else:
-                                raise gemini_error
-                    else:
-                        content_response = await asyncio.wait_for(
-                            self._call_openai(content_prompt), 
-                            timeout=45.0
-                        )
-                    
-                    content_items.append({
-                        'topic': main_chapter,
-                        'subtopic': subtopic,
-                        'content': content_response.strip()
-                    })
-                    
-                except asyncio.TimeoutError:
-                    logger.warning(f"Content generation timed out for subtopic: {subtopic}")
-                    # Add fallback content
-                    content_items.append({
-                        'topic': main_chapter,
-                        'subtopic': subtopic,
-                        'content': f"Content for {subtopic} based on the provided educational material."
-                    })
-                except Exception as e:
-                    logger.warning(f"Error generating content for {subtopic}: {str(e)}")
-                    # Add fallback content
-                    content_items.append({
-                        'topic': main_chapter,
-                        'subtopic': subtopic,
-                        'content': f"Content for {subtopic} based on the provided educational material."
-                    })
-                    continue
+            # Generate content for up to 6 subtopics concurrently, in-flight
+            # provider calls are still capped by the process-wide semaphore
+            content_items = list(await asyncio.gather(*(
+                self._generate_subtopic_content(subtopic, main_chapter, processed_text)
+                for subtopic in subtopics[:6]
+            )))
             
             # Ensure we have at least some content
             if len(content_items) == 0:
@@ -245,26 +566,114 @@ class LLMService:
                     'content': processed_text[:500] + "..." if len(processed_text) > 500 else processed_text
                 }]
             
-            processing_time = time.time() - start_time
+            return self._content_result(text, main_chapter, content_items, start_time)
+        
+        except Exception as e:
+            logger.error(f"Error generating educational content: {str(e)}")
+            return self._failed_result(text, str(e))
+    
+    @staticmethod
+    def _content_result(text: str, main_chapter: str, content_items: List[Dict[str, str]], start_time: float) -> Dict[str, Any]:
+        """Result dictionary for a text whose content was generated"""
+        return {
+            'success': True,
+            'original_text': text,
+            'content_items': content_items,
+            'topic': main_chapter,
+            'processed_at_ms': now_ms(),
+            'processing_time': time.time() - start_time,
+            'total_items': len(content_items)
+        }
+    
+    @staticmethod
+    def _failed_result(text: str, error: str) -> Dict[str, Any]:
+        """Result dictionary for a text whose content generation failed"""
+        return {
+            'success': False,
+            'error': error,
+            'original_text': text,
+            'content_items': []
+        }
+    
+    @staticmethod
+    def _subtopic_context(subtopic: str, processed_text: str) -> str:
+        """
+        Slice of the source text relevant to one subtopic
+        
+        The window starts just before the first mention of any word of the
+        subtopic name, or at the top of the text if it is never mentioned.
+        
+        Args:
+            subtopic: Subtopic name
+            processed_text: Source text
+            
+        Returns:
+            At most SUBTOPIC_CONTEXT_LENGTH characters of processed_text
+        """
+        if len(processed_text) <= SUBTOPIC_CONTEXT_LENGTH:
+            return processed_text
+        
+        lowered = processed_text.lower()
+        positions = [
+            position for position in (lowered.find(word) for word in _KEYWORD_RE.findall(subtopic.lower()))
+            if position >= 0
+        ]
+        start = max(0, min(positions) - SUBTOPIC_CONTEXT_LEAD) if positions else 0
+        start = min(start, len(processed_text) - SUBTOPIC_CONTEXT_LENGTH)
+        return processed_text[start:start + SUBTOPIC_CONTEXT_LENGTH]
+    
+    @classmethod
+    def _build_subtopic_prompt(cls, subtopic: str, main_chapter: str, processed_text: str) -> str:
+        """Content prompt for one subtopic, quoting only the part of the source text about it"""
+        # Simplified, faster content prompt
+        return f"""
+        Create brief educational content for "{subtopic}" based on this text.
+        
+        Chapter: {main_chapter}
+        Subtopic: {subtopic}
+        Text: {cls._subtopic_context(subtopic, processed_text)}
+        
+        Guidelines:
+        - Write 2-3 concise paragraphs (100-200 words)
+        - Focus only on this specific subtopic
+        - Use clear, simple language
+        - Include key points and examples
+        - Keep it educational but brief
+        """
+    
+    async def _generate_subtopic_content(self, subtopic: str, main_chapter: str, processed_text: str) -> Dict[str, str]:
+        """
+        Generate the content item for one subtopic, with timeout
+        
+        Args:
+            subtopic: Subtopic to write about
+            main_chapter: Chapter the subtopic belongs to
+            processed_text: Source text (MathJax-converted for math content)
+            
+        Returns:
+            Content item dictionary, with placeholder content if generation fails
+        """
+        try:
+            content_prompt = self._build_subtopic_prompt(subtopic, main_chapter, processed_text)
+            content_response = await self._call_llm(content_prompt, timeout=45.0)  # 45 second timeout per subtopic
             
             return {
-                'success': True,
-                'original_text': text,
-                'content_items': content_items,
                 'topic': main_chapter,
-                'processed_at': datetime.now(),
-                'processing_time': processing_time,
-                'total_items': len(content_items)
+                'subtopic': subtopic,
+                'content': content_response.strip()
             }
             
+        except asyncio.TimeoutError:
+            logger.warning(f"Content generation timed out for subtopic: {subtopic}")
         except Exception as e:
-            logger.error(f"Error generating educational content: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e),
-                'original_text': text,
-                'content_items': []
-            }
+            logger.warning(f"Error generating content for {subtopic}: {str(e)}")
+        
+        # Add fallback content
+        return {
+            'topic': main_chapter,
+            'subtopic': subtopic,
+            'content': f"Content for {subtopic} based on the provided educational material."
+        }
     
     async def _generate_quick_subtopics(self, text: str, main_chapter: str) -> List[str]:
         """Generate subtopics quickly with timeout"""
@@ -280,44 +689,15 @@ class LLMService:
             Focus on main concepts, definitions, processes, or key topics.
             """
             
-            if self.gemini_model and self._check_gemini_rate_limit():
-                try:
-                    response = await asyncio.wait_for(
-                        self._call_gemini(prompt), 
-                        timeout=20.0
-                    )
-                    self._increment_gemini_calls()
-                except Exception as gemini_error:
-                    if "429" in str(gemini_error) or "quota" in str(gemini_error).lower():
-                        logger.warning("Gemini rate limit hit in quick subtopics, falling back to OpenAI")
-                        if settings.OPENAI_API_KEY:
-                            response = await asyncio.wait_for(
-                                self._call_openai(prompt), 
-                                timeout=20.0
-                            )
-                        else:
-                            raise gemini_error
-                    else:
-                        raise gemini_error
-            else:
-                response = await asyncio.wait_for(
-                    self._call_openai(prompt), 
-                    timeout=20.0
-                )
+            response = await self._call_llm(prompt, timeout=20.0, deterministic=True)
             
             try:
-                cleaned_response = response.strip()
-                if cleaned_response.startswith('```json'):
-                    cleaned_response = cleaned_response[7:]
-                if cleaned_response.endswith('```'):
-                    cleaned_response = cleaned_response[:-3]
-                cleaned_response = cleaned_response.strip()
-                
-                subtopics = json.loads(cleaned_response)
-                if isinstance(subtopics, list) and len(subtopics) > 0:
+                subtopics = _parse_llm_json(List[str], response)
+                if len(subtopics) > 0:
                     return subtopics[:6]  # Limit to 6 subtopics
-            except:
-                pass
+            except ValidationError as e:
+                # Covers malformed JSON too, pydantic reports it as json_invalid
+                logger.warning(f"Quick subtopic parsing failed: {str(e)}")
             
             # Quick fallback subtopics
             return [
@@ -355,35 +735,25 @@ class LLMService:
                 return text
             
             # Look for potential mathematical expressions
-            import re
-            
-            # Simple pattern to identify potential formulas
-            formula_patterns = [
-                r'[A-Z]\([a-z]\)\s*=\s*[^.!?]+',  # P(z) = ...
-                r'[a-zA-Z]_{[^}]+}',  # a_{n}
-                r'\\[a-zA-Z]+',  # LaTeX commands
-                r'[a-zA-Z]\^[0-9]+',  # x^2
-                r'√[^.!?]+',  # Square roots
-            ]
-            
-            formulas_found = []
-            for pattern in formula_patterns:
-                matches = re.findall(pattern, text)
-                formulas_found.extend(matches)
+            formulas_found = _FORMULA_RE.findall(text)
             
             if not formulas_found:
                 return text
             
-            # Use MathPix to convert formulas
+            # Use MathPix to convert formulas, all requests in flight at once.
+            # The text is capped at PROMPT_TEXT_LENGTH, which bounds the fan-out
+            unique_formulas = list(dict.fromkeys(formulas_found))  # Remove duplicates, keep order
+            mathpix_responses = await asyncio.gather(
+                *(self._call_mathpix(formula) for formula in unique_formulas),
+                return_exceptions=True
+            )
+            
             converted_text = text
-            for formula in set(formulas_found):  # Remove duplicates
-                try:
-                    mathpix_response = await self._call_mathpix(formula)
-                    if mathpix_response:
-                        converted_text = converted_text.replace(formula, mathpix_response)
-                except Exception as e:
-                    logger.warning(f"MathPix conversion failed for {formula}: {str(e)}")
-                    continue
+            for formula, mathpix_response in zip(unique_formulas, mathpix_responses):
+                if isinstance(mathpix_response, Exception):
+                    logger.warning(f"MathPix conversion failed for {formula}: {str(mathpix_response)}")
+                elif mathpix_response:
+                    converted_text = converted_text.replace(formula, mathpix_response)
             
             return converted_text
             
@@ -414,12 +784,7 @@ class LLMService:
                 "formats": ["text", "data"]
             }
             
-            # Run the request in a thread pool
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, 
-                lambda: requests.post(url, headers=headers, json=data, timeout=10)
-            )
+            response = await self._http.post(url, headers=headers, json=data, timeout=10.0)
             
             if response.status_code == 200:
                 result = response.json()
@@ -435,54 +800,134 @@ class LLMService:
             logger.warning(f"MathPix API call failed: {str(e)}")
             return formula
     
-    async def _call_gemini(self, prompt: str) -> str:
+    async def _call_gemini(self, prompt: str, json_mode: bool = False, timeout: Optional[float] = None,
+                           deterministic: bool = False) -> str:
         """
         Make API call to Gemini
         
         Args:
             prompt: Input prompt
+            json_mode: Ask for a JSON response (responseMimeType)
+            timeout: Seconds allowed for the call once a concurrency permit is held
+            deterministic: Sample at temperature 0 and cache the answer
             
         Returns:
             Response from Gemini
         """
-        try:
-            if self.gemini_model:
-                loop = asyncio.get_event_loop()
-                response = await loop.run_in_executor(None, self.gemini_model.generate_content, prompt)
-                return response.text.strip()
-            else:
-                raise Exception("Gemini API key not configured")
-            
-        except Exception as e:
-            logger.error(f"Gemini API error: {str(e)}")
-            raise
+        if not self.gemini_model:
+            raise Exception("Gemini API key not configured")
+        
+        generation_config = GEMINI_JSON_GENERATION_CONFIG if json_mode else GEMINI_GENERATION_CONFIG
+        if deterministic:
+            generation_config = {**generation_config, "temperature": 0.0}
+            
+            # Sampling settings are part of the key, a different config must not reuse answers
+            cache_params = {"provider": "gemini", "model": settings.GEMINI_MODEL, **generation_config}
+            cached = await self.response_cache.get(prompt, cache_params)
+            if cached is not None:
+                return cached
+        
+        # Queueing for a permit doesn't count against the timeout
+        async with _llm_semaphore:
+            result = await asyncio.wait_for(
+                self._collect_stream("Gemini", self._stream_gemini(prompt, generation_config)),
+                timeout=timeout
+            )
+        # Sampled answers vary between calls, and an empty answer (e.g. blocked
+        # by safety filters) must not be replayed for the whole TTL
+        if deterministic and result:
+            await self.response_cache.set(prompt, cache_params, result)
+        return result
+    
+    @staticmethod
+    async def _collect_stream(provider: str, stream: AsyncIterator[str]) -> str:
+        """Join a streamed response, logging the time to its first chunk"""
+        chunks = []
+        start_time = time.perf_counter()
+        async for chunk in stream:
+            if not chunks:
+                logger.debug(f"{provider} first chunk after {time.perf_counter() - start_time:.2f}s")
+            chunks.append(chunk)
+        return "".join(chunks).strip()
     
-    async def _call_openai(self, prompt: str) -> str:
+    async def _stream_gemini(self, prompt: str, generation_config: Dict[str, Any] = GEMINI_GENERATION_CONFIG) -> AsyncIterator[str]:
+        """
+        Stream a Gemini response as server-sent events, yielding text chunks in order
+        
+        Errors surface as soon as the response starts instead of after
+        the full generation.
+        """
+        async with self._http.stream(
+            "POST",
+            GEMINI_STREAM_URL.format(model=self.gemini_model),
+            params={"alt": "sse"},
+            headers={"x-goog-api-key": settings.GEMINI_API_KEY, "Content-Type": "application/json"},
+            content=orjson.dumps({
+                "contents": [{"parts": [{"text": prompt}]}],
+                "generationConfig": generation_config
+            })
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                candidates = orjson.loads(line[5:]).get('candidates') or [{}]
+                for part in candidates[0].get('content', {}).get('parts', []):
+                    if 'text' in part:
+                        yield part['text']
+    
+    async def _call_openai(self, prompt: str, json_mode: bool = False, timeout: Optional[float] = None,
+                           deterministic: bool = False) -> str:
         """
         Make API call to OpenAI (fallback)
         
         Args:
             prompt: Input prompt
+            json_mode: Ask for a JSON object response (response_format)
+            timeout: Seconds allowed for the call once a concurrency permit is held
+            deterministic: Sample at temperature 0 and cache the answer
             
         Returns:
             Response from OpenAI
         """
-        try:
-            if settings.OPENAI_API_KEY:
-                response = openai.ChatCompletion.create(
-                    model=settings.OPENAI_MODEL,
-                    messages=[
-                        {"role": "system", "content": "You are a helpful educational content generator."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=1000,
-                    temperature=0.3
-                )
-                
-                return response.choices[0].message.content.strip()
-            else:
-                raise Exception("OpenAI API key not configured")
-            
-        except Exception as e:
-            logger.error(f"OpenAI API error: {str(e)}")
-            raise 
\ No newline at end of file
+        if not self.openai_client:
+            raise Exception("OpenAI API key not configured")
+        
+        completion_params = OPENAI_JSON_COMPLETION_PARAMS if json_mode else OPENAI_COMPLETION_PARAMS
+        if deterministic:
+            completion_params = {**completion_params, "temperature": 0.0}
+            cache_params = {"provider": "openai", "model": settings.OPENAI_MODEL, **completion_params}
+            cached = await self.response_cache.get(prompt, cache_params)
+            if cached is not None:
+                return cached
+        
+        async with _llm_semaphore:
+            result = await asyncio.wait_for(
+                self._collect_stream("OpenAI", self._stream_openai(prompt, completion_params)),
+                timeout=timeout
+            )
+        # Sampled answers vary between calls, and an empty answer (e.g. blocked
+        # by safety filters) must not be replayed for the whole TTL
+        if deterministic and result:
+            await self.response_cache.set(prompt, cache_params, result)
+        return result
+    
+    async def _stream_openai(self, prompt: str, completion_params: Dict[str, Any] = OPENAI_COMPLETION_PARAMS) -> AsyncIterator[str]:
+        """
+        Stream an OpenAI chat completion, yielding text chunks in order
+        
+        Errors surface as soon as the response starts instead of after
+        the full generation.
+        """
+        stream = await self.openai_client.chat.completions.create(
+            model=settings.OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": "You are a helpful educational content generator."},
+                {"role": "user", "content": prompt}
+            ],
+            stream=True,
+            **completion_params
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content 
\ No newline at end of file
@@ -7,11 +7,42 @@ import logging
 from PIL import Image
 import cv2
 import numpy as np
+import re
 from typing import Dict, Any, List, Optional
-import json
+
+try:
+    import orjson as _json
+except ImportError:  # stdlib json parses the same input, just slower
+    import json as _json
 
 logger = logging.getLogger(__name__)
 
+# LaTeX fragments to pull out of a formula response without a "LaTeX:" line,
+# tried in order (first pattern with a match wins)
+_LATEX_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'\\[a-zA-Z]+[^{}]*\{[^{}]*\}',  # Basic LaTeX commands
+    r'[a-zA-Z_]+\\[a-zA-Z]+',  # Variables with LaTeX commands
+    r'\\frac\{[^}]+\}\{[^}]+\}',  # Fractions
+    r'\\sqrt\{[^}]+\}',  # Square roots
+))
+
+# Mathematical symbols and patterns in OCR'd text that mark an image as a formula.
+# Any one of them is enough, so they are fused into a single alternation
+_MATH_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in (
+    r'[a-zA-Z]\s*=\s*[a-zA-Z0-9+\-*/()]+',  # Equations like "x = y + z"
+    r'[a-zA-Z]\s*\+\s*[a-zA-Z]',  # Addition patterns
+    r'[a-zA-Z]\s*\*\s*[a-zA-Z]',  # Multiplication patterns
+    r'[a-zA-Z]\s*/\s*[a-zA-Z]',   # Division patterns
+    r'[a-zA-Z]\s*\^\s*[0-9]',     # Exponentiation
+    r'\\[a-zA-Z]+',               # LaTeX commands
+    r'[a-zA-Z]_{[0-9]+}',         # Subscripts
+    r'[a-zA-Z]\^{[0-9]+}',        # Superscripts
+    r'polynomial',                # Mathematical terms
+    r'function',
+    r'variable',
+    r'coefficient'
+)), re.IGNORECASE)
+
 class MistralOCRService:
     """Service for OCR using Mistral AI Vision capabilities"""
     
@@ -141,13 +172,13 @@ class MistralOCRService:
             
             # Try to parse JSON response
             try:
-                table_data = json.loads(response.choices[0].message.content)
+                table_data = _json.loads(response.choices[0].message.content)
                 return {
                     'success': True,
                     'table_data': table_data,
                     'content_type': 'table'
                 }
-            except json.JSONDecodeError:
+            except ValueError:
                 # Fallback to text extraction
                 return {
                     'success': True,
@@ -208,17 +239,10 @@ class MistralOCRService:
                 latex_match = latex_part
             else:
                 # If no LaTeX: prefix, try to extract LaTeX patterns
-                import re
-                latex_patterns = [
-                    r'\\[a-zA-Z]+[^{}]*\{[^{}]*\}',  # Basic LaTeX commands
-                    r'[a-zA-Z_]+\\[a-zA-Z]+',  # Variables with LaTeX commands
-                    r'\\frac\{[^}]+\}\{[^}]+\}',  # Fractions
-                    r'\\sqrt\{[^}]+\}',  # Square roots
-                ]
-                for pattern in latex_patterns:
-                    matches = re.findall(pattern, response_text)
-                    if matches:
-                        latex_match = matches[0]
+                for pattern in _LATEX_PATTERNS:
+                    match = pattern.search(response_text)
+                    if match:
+                        latex_match = match.group(0)
                         break
             
             return {
@@ -332,25 +356,8 @@ class MistralOCRService:
                 ocr_text = pytesseract.image_to_string(image, config='--psm 6')
                 
                 # Check for mathematical symbols and patterns
-                math_patterns = [
-                    r'[a-zA-Z]\s*=\s*[a-zA-Z0-9+\-*/()]+',  # Equations like "x = y + z"
-                    r'[a-zA-Z]\s*\+\s*[a-zA-Z]',  # Addition patterns
-                    r'[a-zA-Z]\s*\*\s*[a-zA-Z]',  # Multiplication patterns
-                    r'[a-zA-Z]\s*/\s*[a-zA-Z]',   # Division patterns
-                    r'[a-zA-Z]\s*\^\s*[0-9]',     # Exponentiation
-                    r'\\[a-zA-Z]+',               # LaTeX commands
-                    r'[a-zA-Z]_{[0-9]+}',         # Subscripts
-                    r'[a-zA-Z]\^{[0-9]+}',        # Superscripts
-                    r'polynomial',                # Mathematical terms
-                    r'function',
-                    r'variable',
-                    r'coefficient'
-                ]
-                
-                import re
-                for pattern in math_patterns:
-                    if re.search(pattern, ocr_text, re.IGNORECASE):
-                        return "formula"
+                if _MATH_RE.search(ocr_text):
+                    return "formula"
                 
             except Exception as ocr_error:
                 logger.warning(f"OCR error in content type detection: {str(ocr_error)}")
@@ -2,6 +2,7 @@ import pytesseract
 from PIL import Image
 import cv2
 import numpy as np
+import asyncio
 import os
 import re
 from typing import Optional, Dict, Any
@@ -34,15 +35,8 @@ class OCRService:
             if not os.path.exists(image_path):
                 raise FileNotFoundError(f"Image file not found: {image_path}")
             
-            # Use single, most effective approach
-            image = self._preprocess_image(image_path)
-            text = pytesseract.image_to_string(
-                image, 
-                lang=language,
-                config='--psm 6'  # Assume uniform block of text
-            )
-            
-            cleaned_text = self._clean_text(text)
+            # OpenCV and Tesseract block, so run them off the event loop
+            cleaned_text = await asyncio.to_thread(self._run_ocr, image_path, language)
             
             if cleaned_text.strip():
                 logger.info(f"Successfully extracted text from {image_path}")
@@ -55,6 +49,27 @@ class OCRService:
             logger.error(f"Error extracting text from {image_path}: {str(e)}")
             return ""
     
+    def _run_ocr(self, image_path: str, language: str) -> str:
+        """
+        Preprocess an image and run Tesseract on it (blocking)
+        
+        Args:
+            image_path: Path to the image file
+            language: Language code for OCR processing
+            
+        Returns:
+            Cleaned text extracted from the image
+        """
+        # Use single, most effective approach
+        image = self._preprocess_image(image_path)
+        text = pytesseract.image_to_string(
+            image, 
+            lang=language,
+            config='--psm 6'  # Assume uniform block of text
+        )
+        
+        return self._clean_text(text)
+    
     def _preprocess_image(self, image_path: str) -> np.ndarray:
         """
         Preprocess image for better OCR results - simplified version
@@ -5,7 +5,7 @@ from PIL import Image
 import io
 import os
 import re
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 import logging
 from app.services.ocr_service import OCRService
 from app.services.mistral_ocr_service import MistralOCRService
@@ -13,11 +13,42 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Chapter headings for educational content, tried in order (first match wins).
+# Chapter/Unit/Lesson/Topic/Section keywords never overlap the numeric forms,
+# so they share one pattern.
+_CHAPTER_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'^(?:Chapter|Unit|Lesson|Topic|Section)\s+(\d+)[:\s]*(.+)$',
+    r'^(\d+)\.\s*(.+)$',
+    r'^(\d+)\s+(.+)$',
+    # For curriculum documents
+    r'^(\d+\.\d+)\s*(.+)$',  # 1.1, 1.2, etc.
+    r'^(\d+\.\d+\.\d+)\s*(.+)$',  # 1.1.1, 1.1.2, etc.
+))
+
+# Section headings, tried in order (case-sensitive)
+_SECTION_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'^(\d+\.\d+\.\d+)\s*(.+)$',
+    r'^(\d+\.\d+\.\d+\.\d+)\s*(.+)$',
+    r'^([A-Z][A-Z\s]+)$',
+    r'^([A-Z][a-z\s]+)$',
+    r'^([a-z][a-z\s]+)$',
+    r'^([A-Z][a-z]+[A-Z][a-z\s]+)$',  # CamelCase headings
+))
+
+def _first_match(patterns: Tuple[re.Pattern, ...], line: str) -> Optional[re.Match]:
+    """Return the match of the first pattern that matches the line, if any"""
+    for pattern in patterns:
+        match = pattern.match(line)
+        if match:
+            return match
+    return None
+
 class PDFService:
     """Service for processing PDF files and extracting text and images"""
     
-    def __init__(self):
-        self.ocr_service = OCRService()
+    def __init__(self, ocr_service: Optional[OCRService] = None, llm_service=None):
+        self.ocr_service = ocr_service or OCRService()
+        self.llm_service = llm_service
         # Initialize Mistral OCR if API key is available
         if hasattr(settings, 'MISTRAL_API_KEY') and settings.MISTRAL_API_KEY:
             self.mistral_ocr = MistralOCRService(settings.MISTRAL_API_KEY)
@@ -257,81 +288,47 @@ class PDFService:
     
     async def _extract_structure(self, text: str) -> Dict[str, Any]:
         """Extract chapter and section structure from text"""
-        structure = {
-            'chapters': [],
-            'sections': []
-        }
-        
-        # Enhanced chapter patterns for educational content
-        chapter_patterns = [
-            r'^Chapter\s+(\d+)[:\s]*(.+)$',
-            r'^CHAPTER\s+(\d+)[:\s]*(.+)$',
-            r'^(\d+)\.\s*(.+)$',
-            r'^(\d+)\s+(.+)$',
-            r'^Unit\s+(\d+)[:\s]*(.+)$',
-            r'^UNIT\s+(\d+)[:\s]*(.+)$',
-            r'^Lesson\s+(\d+)[:\s]*(.+)$',
-            r'^LESSON\s+(\d+)[:\s]*(.+)$',
-            r'^Topic\s+(\d+)[:\s]*(.+)$',
-            r'^TOPIC\s+(\d+)[:\s]*(.+)$',
-            r'^Section\s+(\d+)[:\s]*(.+)$',
-            r'^SECTION\s+(\d+)[:\s]*(.+)$',
-            # For curriculum documents
-            r'^(\d+\.\d+)\s*(.+)$',  # 1.1, 1.2, etc.
-            r'^(\d+\.\d+\.\d+)\s*(.+)$',  # 1.1.1, 1.1.2, etc.
-        ]
-        
-        # Enhanced section patterns
-        section_patterns = [
-            r'^(\d+\.\d+\.\d+)\s*(.+)$',
-            r'^(\d+\.\d+\.\d+\.\d+)\s*(.+)$',
-            r'^([A-Z][A-Z\s]+)$',
-            r'^([A-Z][a-z\s]+)$',
-            r'^([a-z][a-z\s]+)$',
-            r'^([A-Z][a-z]+[A-Z][a-z\s]+)$',  # CamelCase headings
-        ]
-        
-        lines = text.split('\n')
+        chapters = []
+        sections = []
         
-        for line_num, line in enumerate(lines):
+        for line_num, line in enumerate(text.split('\n')):
             line = line.strip()
             
             # Skip empty lines and very short lines
             if not line or len(line) < 3:
                 continue
-                
+            
             # Check for chapters
-            for pattern in chapter_patterns:
-                match = re.match(pattern, line, re.IGNORECASE)
-                if match:
-                    chapter_title = match.group(2).strip() if len(match.groups()) > 1 else match.group(1)
-                    # Skip if the title is too short or looks like a page number
-                    if len(chapter_title) > 2 and not chapter_title.isdigit():
-                        structure['chapters'].append({
-                            'number': match.group(1),
-                            'title': chapter_title,
-                            'line': line_num + 1
-                        })
-                    break
+            match = _first_match(_CHAPTER_PATTERNS, line)
+            if match:
+                chapter_title = match.group(2).strip()
+                # Skip if the title is too short or looks like a page number
+                if len(chapter_title) > 2 and not chapter_title.isdigit():
+                    chapters.append({
+                        'number': match.group(1),
+                        'title': chapter_title,
+                        'line': line_num + 1
+                    })
+                continue
             
             # Check for sections (only if no chapter was found)
-            if not any(re.match(pattern, line, re.IGNORECASE) for pattern in chapter_patterns):
-                for pattern in section_patterns:
-                    match = re.match(pattern, line)
-                    if match:
-                        section_title = match.group(2).strip() if len(match.groups()) > 1 else match.group(1)
-                        # Skip if the title is too short
-                        if len(section_title) > 2:
-                            structure['sections'].append({
-                                'number': match.group(1),
-                                'title': section_title,
-                                'line': line_num + 1
-                            })
-                        break
+            match = _first_match(_SECTION_PATTERNS, line)
+            if match:
+                section_title = match.group(2).strip() if len(match.groups()) > 1 else match.group(1)
+                # Skip if the title is too short
+                if len(section_title) > 2:
+                    sections.append({
+                        'number': match.group(1),
+                        'title': section_title,
+                        'line': line_num + 1
+                    })
         
-        # Sort chapters and sections by line number
-        structure['chapters'].sort(key=lambda x: x['line'])
-        structure['sections'].sort(key=lambda x: x['line'])
+        # Lines are scanned in order, so both lists are already sorted by line number.
+        # The structure is read-only from here on, so freeze it into tuples
+        structure = {
+            'chapters': tuple(chapters),
+            'sections': tuple(sections)
+        }
         
         logger.info(f"Extracted {len(structure['chapters'])} chapters and {len(structure['sections'])} sections")
         
@@ -381,9 +378,10 @@ class PDFService:
         Use LLM to analyze content and create structured data
         """
         try:
-            from app.services.llm_service import LLMService
-            
-            llm_service = LLMService()
+            if self.llm_service is None:
+                from app.services.llm_service import LLMService
+                self.llm_service = LLMService()
+            llm_service = self.llm_service
             content_items = []
             
             logger.info(f"Starting LLM content analysis. Text length: {len(text)}")
@@ -392,53 +390,50 @@ class PDFService:
             # Split text into chunks based on structure
             if structure.get('chapters'):
                 logger.info(f"Found {len(structure['chapters'])} chapters")
-                for i, chapter in enumerate(structure['chapters']):
+                chapter_texts = []
+                chapter_topics = []
+                chapters = structure['chapters']
+                # Split once, every chapter slices the same lines
+                lines = text.split('\n')
+                for i, chapter in enumerate(chapters):
                     logger.info(f"Processing chapter {i+1}: {chapter}")
                     
                     # Get chapter content
                     chapter_start = chapter['line']
-                    chapter_end = len(text.split('\n')) if chapter == structure['chapters'][-1] else structure['chapters'][structure['chapters'].index(chapter) + 1]['line']
+                    chapter_end = chapters[i + 1]['line'] if i + 1 < len(chapters) else len(lines)
                     
                     # Extract chapter text
-                    lines = text.split('\n')
                     chapter_text = '\n'.join(lines[chapter_start-1:chapter_end-1])
                     
                     logger.info(f"Chapter {i+1} text length: {len(chapter_text)}")
-                    
-                    # Generate structured content for this chapter with subtopics
-                    try:
-                        # Use the new improved content generation method
-                        content_result = await llm_service.generate_educational_content(
-                            text=chapter_text,
-                            topic=f"Chapter {chapter['number']}: {chapter['title']}"
-                        )
+                    chapter_texts.append(chapter_text)
+                    chapter_topics.append(f"Chapter {chapter['number']}: {chapter['title']}")
+                
+                # Generate structured content for all chapters, their outlines
+                # are analysed a batch of chapters per LLM call
+                try:
+                    content_results = await llm_service.generate_educational_content_batch(chapter_texts, chapter_topics)
+                except Exception as batch_error:
+                    logger.error(f"Error processing chapters: {str(batch_error)}")
+                    content_results = [{'success': False, 'error': str(batch_error)}] * len(chapter_texts)
+                
+                for i, (chapter_text, chapter_topic, content_result) in enumerate(zip(chapter_texts, chapter_topics, content_results)):
+                    if content_result['success']:
+                        logger.info(f"Generated {len(content_result['content_items'])} content items for chapter {i+1}")
                         
-                        if content_result['success']:
-                            logger.info(f"Generated {len(content_result['content_items'])} content items for chapter {i+1}")
-                            
-                            # Add all content items to the list
-                            for item in content_result['content_items']:
-                                content_items.append({
-                                    'topic': item.get('topic', f"Chapter {chapter['number']}: {chapter['title']}"),
-                                    'subtopic': item.get('subtopic', ''),
-                                    'content': item.get('content', ''),
-                                    'video_link': item.get('video_link', '')
-                                })
-                        else:
-                            logger.error(f"Content generation failed for chapter {i+1}: {content_result.get('error', 'Unknown error')}")
-                            # Fallback to basic content
+                        # Add all content items to the list
+                        for item in content_result['content_items']:
                             content_items.append({
-                                'topic': f"Chapter {chapter['number']}: {chapter['title']}",
-                                'subtopic': 'Main Content',
-                                'content': chapter_text[:1000] + "..." if len(chapter_text) > 1000 else chapter_text,
-                                'video_link': ''
+                                'topic': item.get('topic', chapter_topic),
+                                'subtopic': item.get('subtopic', ''),
+                                'content': item.get('content', ''),
+                                'video_link': item.get('video_link', '')
                             })
-                            
-                    except Exception as chapter_error:
-                        logger.error(f"Error processing chapter {i+1}: {str(chapter_error)}")
+                    else:
+                        logger.error(f"Content generation failed for chapter {i+1}: {content_result.get('error', 'Unknown error')}")
                         # Fallback to basic content
                         content_items.append({
-                            'topic': f"Chapter {chapter['number']}: {chapter['title']}",
+                            'topic': chapter_topic,
                             'subtopic': 'Main Content',
                             'content': chapter_text[:1000] + "..." if len(chapter_text) > 1000 else chapter_text,
                             'video_link': ''
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from app.services.excel_service import ExcelService
+
+
+def _baseline_fields(item, getter):
+    return {
+        'Topic': str(getter(item, 'topic', 'Topic')).strip(),
+        'Subtopic': str(getter(item, 'subtopic', 'Subtopic')).strip(),
+        'Content': str(getter(item, 'content', 'Content')).strip(),
+        'Video Link': str(getter(item, 'video_link', 'Video Link', 'Video_Link')).strip()
+    }
+
+
+def _lowercase_get(item, key, *aliases):
+    return item.get(key, '')
+
+
+def _alias_get(item, key, *aliases):
+    value = ''
+    for alias in reversed(aliases):
+        value = item.get(alias, value)
+    return item.get(key, value)
+
+
+def baseline_parse_json_data(data):
+    """Reference copy of the original per-item parse_json_data loop"""
+    parsed_data = []
+    for item in data:
+        if isinstance(item, str):
+            cleaned_item = item.strip()
+            if cleaned_item.startswith('```json'):
+                cleaned_item = cleaned_item[7:]
+            if cleaned_item.endswith('```'):
+                cleaned_item = cleaned_item[:-3]
+            try:
+                parsed = json.loads(cleaned_item.strip())
+            except ValueError:
+                parsed = None
+            if isinstance(parsed, list):
+                parsed_data.extend(_baseline_fields(list_item, _lowercase_get) for list_item in parsed if isinstance(list_item, dict))
+            elif isinstance(parsed, dict):
+                parsed_data.append(_baseline_fields(parsed, _lowercase_get))
+            else:
+                parsed_data.append({'Topic': '', 'Subtopic': '', 'Content': str(item).strip(), 'Video Link': ''})
+        elif isinstance(item, dict):
+            parsed_data.append(_baseline_fields(item, _alias_get))
+        else:
+            parsed_data.append({'Topic': '', 'Subtopic': '', 'Content': str(item).strip(), 'Video Link': ''})
+    return parsed_data
+
+
+CASES = {
+    'empty': [],
+    'plain dicts': [
+        {'topic': ' Algebra ', 'subtopic': 'Linear equations', 'content': ' Solve for x ', 'video_link': 'https://example.com/v'},
+        {'Topic': 'Geometry', 'Subtopic': 'Angles', 'Content': 'Sum to 180', 'Video Link': 'a'},
+        {'topic': 'Calculus', 'Video_Link': 'b'}
+    ],
+    'numbers': [{'Content': 5}, {'content': 1.5}, {'topic': 3, 'Topic': 'ignored'}, {'Content': True}],
+    'missing values': [{'content': None}, {'Topic': float('nan'), 'content': 'x'}, {}],
+    'alias precedence': [
+        {'topic': None, 'Topic': 'T'},
+        {'content': '', 'Content': 'C'},
+        {'Video Link': None, 'Video_Link': 'v'}
+    ],
+    'json strings': [
+        '{"topic": " Physics ", "content": "Motion", "Content": "ignored"}',
+        '```json\n[{"topic": "a", "content": 1}, "skipped", {"subtopic": null}]\n```',
+        '  ```json {"Topic": "only lowercase keys are read"} ```  '
+    ],
+    'non json': ['  plain text  ', '[not json', '42', 7, None, ['a', 'b']],
+    'mixed': [{'Content': 5}, {'content': 'x'}, '{"content": 2.0}', 3]
+}
+
+
+@pytest.mark.parametrize('data', CASES.values(), ids=CASES.keys())
+def test_parse_json_data_matches_baseline(data):
+    assert ExcelService().parse_json_data(data) == baseline_parse_json_data(data)
+
+
+def test_parse_json_data_keeps_cell_text():
+    rows = ExcelService().parse_json_data([{'Content': 5}, {'content': 'x'}, {'topic': None, 'Topic': 'T'}])
+    
+    assert [row['Content'] for row in rows] == ['5', 'x', '']
+    assert rows[2]['Topic'] == 'None'
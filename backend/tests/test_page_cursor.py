@@ -0,0 +1,44 @@
+import base64
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.api_v1.endpoints.pdf import _decode_page_cursor, _encode_page_cursor, _page_window
+
+
+def _raw_cursor(value: str) -> str:
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def test_cursor_round_trip():
+    file_id = str(uuid.uuid4())
+    
+    assert _decode_page_cursor(_encode_page_cursor(file_id, 40)) == (file_id, 40)
+
+
+def test_page_window_cursor_points_at_next_batch():
+    file_id = str(uuid.uuid4())
+    pages = [{'page': number} for number in range(1, 6)]
+    
+    batch, cursor = _page_window(file_id, pages, 0, 2)
+    assert batch == pages[:2]
+    assert _decode_page_cursor(cursor) == (file_id, 2)
+    
+    batch, cursor = _page_window(file_id, pages, 4, 2)
+    assert batch == pages[4:]
+    assert cursor is None
+
+
+@pytest.mark.parametrize('cursor', [
+    _raw_cursor(f'{uuid.uuid4()}:-1'),
+    _raw_cursor('../../etc/passwd:0'),
+    _raw_cursor(f'{uuid.uuid4()}:ten'),
+    _raw_cursor('no-separator'),
+    'not base64!',
+    base64.urlsafe_b64encode(b'\xff\xfe:0').decode()
+])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        _decode_page_cursor(cursor)
+    assert error.value.status_code == 400
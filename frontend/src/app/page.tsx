@@ -4,15 +4,9 @@ import { useState } from 'react'
 import { useDropzone } from 'react-dropzone'
 import { Upload, FileText, Brain, Download, Trash2, BookOpen } from 'lucide-react'
 import toast from 'react-hot-toast'
-import { processImage, processPDF, generateExcelFromPDF, generateContent, getExcelContent } from '@/lib/api'
+import { processImage, processPDF, generateExcelFromPDF, generateContent, getExcelContent, toContentItems, ContentItem } from '@/lib/api'
 import { cn } from '@/lib/utils'
 
-interface ContentItem {
-  topic: string
-  subtopic: string
-  content: string
-}
-
 interface ProcessingResult {
   id: string
   originalText: string
@@ -187,7 +181,7 @@ export default function Home() {
       const newResult: ProcessingResult = {
         id: Date.now().toString(),
         originalText: extractedText,
-        contentItems: result.content_items,
+        contentItems: toContentItems(result.content_items),
         processingTime: result.processing_time,
         timestamp: new Date()
       }
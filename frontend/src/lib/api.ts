@@ -36,25 +36,44 @@ export interface OCRResponse {
   text: string
   file_id: string
   original_filename: string
-  processed_at: string
+  processed_at_ms: number
   error?: string
 }
 
 export interface ContentGenerationRequest {
   text: string
   topic?: string
+  echo_input?: boolean
 }
 
+export interface ContentItem {
+  topic: string
+  subtopic: string
+  content: string
+}
+
+// Content items arrive column-wise: one array per field, same length each
+export interface ContentItemColumns {
+  topics: string[]
+  subtopics: string[]
+  contents: string[]
+}
+
+export const toContentItems = (columns: ContentItemColumns): ContentItem[] =>
+  columns.topics.map((topic, i) => ({
+    topic,
+    subtopic: columns.subtopics[i],
+    content: columns.contents[i],
+  }))
+
 export interface ContentGenerationResponse {
   success: boolean
-  original_text: string
-  content_items: Array<{
-    topic: string
-    subtopic: string
-    content: string
-  }>
+  original_text?: string
+  original_text_sha256: string
+  original_text_length: number
+  content_items: ContentItemColumns
   topic?: string
-  processed_at: string
+  processed_at_ms: number
   processing_time: number
   total_items: number
   error?: string
@@ -4,7 +4,7 @@ export interface OCRResponse {
   text: string
   file_id: string
   original_filename: string
-  processed_at: string
+  processed_at_ms: number
   confidence?: number
   language?: string
   error?: string
@@ -20,10 +20,9 @@ export interface LLMRequest {
 
 export interface LLMResponse {
   success: boolean
-  original_text: string
   processed_result: string
   task_type: string
-  processed_at: string
+  processed_at_ms: number
   model_used?: string
   processing_time?: number
   error?: string
@@ -37,11 +36,10 @@ export interface AnalysisRequest {
 
 export interface AnalysisResponse {
   success: boolean
-  original_text: string
   analysis_result: Record<string, any>
   analysis_type: string
   language: string
-  processed_at: string
+  processed_at_ms: number
   confidence_scores?: Record<string, number>
 }
 